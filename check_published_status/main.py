@@ -24,17 +24,17 @@ def main():
         # Read page IDs from file
         page_ids = checker.read_page_ids('page_ids.txt')
         
-        # Check all pages
-        published, unpublished = checker.check_all_pages(page_ids)
-        
-        # Generate CSV reports
-        checker.generate_csv_reports(published, unpublished)
+        # Check all pages, writing the CSV reports as results arrive
+        published_count, unpublished_count, failed_count = checker.generate_csv_reports(page_ids)
         
         # Summary
         print(f"\n📊 Summary:")
         print(f"   Total pages checked: {len(page_ids)}")
-        print(f"   Published: {len(published)}")
-        print(f"   Unpublished: {len(unpublished)}")
+        print(f"   Published: {published_count}")
+        print(f"   Unpublished: {unpublished_count}")
+        if failed_count:
+            print(f"   Failed: {failed_count}")
+            return 1
         
         print("\n✅ Done!")
         return 0
@@ -8,139 +8,233 @@ This module provides functionality to:
 - Generate CSV reports for published and unpublished entries
 """
 
-from contentful_management import Client
+import asyncio
 import os
 import csv
-from typing import List, Dict, Tuple, Optional
+from itertools import islice
+from typing import Any, List, Dict, Tuple
+import aiohttp
 from dotenv import load_dotenv
 
+# Maximum number of entries Contentful returns for a single `sys.id[in]` query
+BATCH_SIZE = 100
+MANAGEMENT_API_URL = 'https://api.contentful.com'
+# Rate limited (429) and server error responses are retried this many times with backoff
+MAX_RETRIES = 5
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_BACKOFF_SECONDS = 0.5
+CSV_FIELDNAMES = ('page_id', 'slug')
+# Write the reports in 1 MiB blocks instead of the default ~8 KiB
+CSV_BUFFER_SIZE = 1024 * 1024
+
 
 class PublishedChecker:
 
-    def __init__(self, space_id_env: str, environment_id_env: str, management_token_env: str):
+    def __init__(self, space_id_env: str, environment_id_env: str, management_token_env: str,
+                 max_workers: int = 10):
         load_dotenv('.env')
         self.space_id = os.getenv(space_id_env)
         self.environment_id = os.getenv(environment_id_env)
         self.management_token = os.getenv(management_token_env)
-        
-        # Initialize Contentful Management API client
-        self.client = Client(self.management_token)
-        self.space = self.client.spaces().find(self.space_id)
-        self.environment = self.space.environments().find(self.environment_id)
+        # Number of concurrent requests to Contentful (keep modest to avoid rate limits)
+        self.max_workers = max_workers
     
     def read_page_ids(self, filename: str) -> List[str]:
         """Read page IDs from a text file"""
         try:
             with open(filename, 'r') as f:
                 # Strip whitespace and filter empty lines
-                page_ids = [line.strip() for line in f if line.strip()]
+                all_ids = [line.strip() for line in f if line.strip()]
+            # Drop duplicate IDs (keeping the first occurrence) so each page is only checked once
+            page_ids = list(dict.fromkeys(all_ids))
             print(f"✅ Read {len(page_ids)} page IDs from {filename}")
+            if len(all_ids) != len(page_ids):
+                print(f"   (removed {len(all_ids) - len(page_ids)} duplicates)")
             return page_ids
         except Exception as e:
             print(f"❌ Error reading file {filename}: {str(e)}")
             raise
     
-    def check_page_status(self, page_id: str) -> Optional[Dict[str, str]]:
-        """Check if a page is published and get its slug"""
+    def _page_status_from_json(self, page_id: str, entry_json: Dict[str, Any]) -> Dict[str, str]:
+        """Build the status result for a raw entry returned by the REST API"""
+        published_version = entry_json.get('sys', {}).get('publishedVersion')
+        return {
+            'page_id': page_id,
+            'slug': self._extract_slug(entry_json.get('fields', {})),
+            'published': published_version is not None and published_version > 0
+        }
+    
+    def _extract_slug(self, fields: Dict[str, Any]) -> str:
+        """Get the slug from entry fields (it's typically in the 'en-US' locale)"""
+        if 'slug' not in fields:
+            return 'N/A'
+        
+        slug_data = fields['slug']
+        # Management API returns fields as {'locale': 'value'}
+        if not isinstance(slug_data, dict):
+            return slug_data or 'N/A'
+        
+        return slug_data.get('en-US') or slug_data.get('en') or next(iter(slug_data.values()), 'N/A')
+    
+    def _not_found_status(self, page_id: str, error_msg: str) -> Dict[str, str]:
+        """Build the status result for an entry that could not be fetched"""
+        return {
+            'page_id': page_id,
+            'slug': 'NOT_FOUND',
+            'published': False,
+            'error': error_msg
+        }
+    
+    def _failed_status(self, page_id: str, error_msg: str) -> Dict[str, Any]:
+        """Build the status result for an entry whose request failed, so its status is unknown"""
+        return {
+            'page_id': page_id,
+            'slug': 'ERROR',
+            'published': None,
+            'error': error_msg
+        }
+    
+    def _chunk_page_ids(self, page_ids: List[str]) -> List[List[str]]:
+        """Split page IDs into batches that fit in a single request"""
+        ids = iter(page_ids)
+        batches = []
+        while True:
+            batch = list(islice(ids, BATCH_SIZE))
+            if not batch:
+                break
+            batches.append(batch)
+        return batches
+    
+    async def _check_batch_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                 page_ids: List[str]) -> List[Dict[str, str]]:
+        """Check a batch of pages with one REST request, keeping the input order"""
+        url = f"{MANAGEMENT_API_URL}/spaces/{self.space_id}/environments/{self.environment_id}/entries"
+        params = {
+            'sys.id[in]': ','.join(page_ids),
+            'limit': len(page_ids)
+        }
         try:
-            # Fetch the entry using Management API (can see unpublished entries)
-            entry = self.environment.entries().find(page_id)
-            
-            # Get slug from fields - Management API returns fields as a dict
-            entry_json = entry.to_json()
-            fields = entry_json.get('fields', {})
-            slug = 'N/A'
-            
-            # Try to get slug field (it's typically in the 'en-US' locale)
-            if 'slug' in fields:
-                slug_data = fields['slug']
-                # Management API returns fields as {'locale': 'value'}
-                if isinstance(slug_data, dict):
-                    slug = slug_data.get('en-US') or slug_data.get('en') or next(iter(slug_data.values()), 'N/A')
-                else:
-                    slug = slug_data or 'N/A'
-            
-            # Check if published using sys metadata
-            try:
-                published_version = entry.published_version
-                is_published = published_version is not None and published_version > 0
-            except AttributeError:
-                # Some entries might not have published_version attribute
-                # Check if it's in the sys data directly
-                sys_data = entry.to_json().get('sys', {})
-                published_version = sys_data.get('publishedVersion')
-                is_published = published_version is not None and published_version > 0
-            
-            return {
-                'page_id': page_id,
-                'slug': slug,
-                'published': is_published
-            }
-            
+            async with semaphore:
+                data = await self._get_json_with_retry(session, url, params)
         except Exception as e:
+            # The request failed - these pages may well exist, so they must not be reported as not found
             error_msg = str(e)
-            print(f"Error: {error_msg}")
-            return {
-                'page_id': page_id,
-                'slug': 'NOT_FOUND',
-                'published': False,
-                'error': error_msg
-            }
+            print(f"❌ Error checking {len(page_ids)} pages: {error_msg}")
+            return [self._failed_status(page_id, error_msg) for page_id in page_ids]
+        
+        entries = {item['sys']['id']: item for item in data.get('items', [])}
+        results = []
+        for page_id in page_ids:
+            entry_json = entries.get(page_id)
+            if entry_json is None:
+                # IDs missing from the response don't exist in this environment
+                results.append(self._not_found_status(page_id, 'Entry not found'))
+            else:
+                results.append(self._page_status_from_json(page_id, entry_json))
+        return results
     
-    def check_all_pages(self, page_ids: List[str]) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
-        """Check all pages and separate into published and unpublished lists"""
-        published = []
-        unpublished = []
+    async def _get_json_with_retry(self, session: aiohttp.ClientSession, url: str,
+                                   params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET a JSON response, retrying rate limits, server errors and dropped connections with backoff"""
+        for attempt in range(MAX_RETRIES + 1):
+            delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                        response.raise_for_status()
+                        return await response.json()
+                    # Contentful says how many seconds remain until the rate limit resets
+                    reset = response.headers.get('X-Contentful-RateLimit-Reset')
+                    if reset is not None:
+                        try:
+                            delay = max(delay, float(reset))
+                        except ValueError:
+                            pass
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == MAX_RETRIES:
+                    raise
+            await asyncio.sleep(delay)
+    
+    def _write_batch(self, results: List[Dict[str, str]], published_writer: Any,
+                     unpublished_writer: Any, checked: int, total: int) -> Tuple[int, int, int]:
+        """Write a batch of results to the reports and return the published/unpublished/failed counts"""
+        published_count = 0
+        unpublished_count = 0
+        failed_count = 0
+        
+        for result in results:
+            checked += 1
+            row = (result['page_id'], result['slug'])
+            if result['published'] is None:
+                # Left out of both reports - its status is unknown
+                failed_count += 1
+                status = "⚠️  Failed"
+            elif result['published']:
+                published_writer.writerow(row)
+                published_count += 1
+                status = "✓ Published"
+            else:
+                unpublished_writer.writerow(row)
+                unpublished_count += 1
+                status = "✗ Unpublished"
+            print(f"  [{checked}/{total}] Checked {result['page_id']}... {status}")
+        
+        return published_count, unpublished_count, failed_count
+    
+    async def check_all_pages_async(self, page_ids: List[str], published_writer: Any,
+                                    unpublished_writer: Any) -> Tuple[int, int, int]:
+        """Check all pages with concurrent REST requests on a single event loop"""
+        batches = self._chunk_page_ids(page_ids)
+        total = len(page_ids)
+        published_count = 0
+        unpublished_count = 0
+        failed_count = 0
+        headers = {'Authorization': f'Bearer {self.management_token}'}
+        # Bound in-flight requests to stay under Contentful's rate limit
+        semaphore = asyncio.Semaphore(self.max_workers)
+        connector = aiohttp.TCPConnector(limit=self.max_workers)
         
         print("\n=== Checking page status ===")
-        for i, page_id in enumerate(page_ids, 1):
-            print(f"  [{i}/{len(page_ids)}] Checking {page_id}...", end=' ')
-            
-            result = self.check_page_status(page_id)
-            
-            if result:
-                if result['published']:
-                    published.append({
-                        'page_id': result['page_id'],
-                        'slug': result['slug']
-                    })
-                    print("✓ Published")
-                else:
-                    unpublished.append({
-                        'page_id': result['page_id'],
-                        'slug': result['slug']
-                    })
-                    print("✗ Unpublished")
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            tasks = [self._check_batch_async(session, semaphore, batch) for batch in batches]
+            # Write each batch the moment it completes, while the remaining batches are still in flight
+            # (a slow batch no longer holds back the ones behind it, so rows follow completion order)
+            for next_batch in asyncio.as_completed(tasks):
+                published, unpublished, failed = self._write_batch(
+                    await next_batch, published_writer, unpublished_writer,
+                    published_count + unpublished_count + failed_count, total
+                )
+                published_count += published
+                unpublished_count += unpublished
+                failed_count += failed
         
-        return published, unpublished
+        return published_count, unpublished_count, failed_count
     
-    def generate_csv_reports(self, published: List[Dict[str, str]], unpublished: List[Dict[str, str]]):
-        """Generate CSV reports for published and unpublished pages"""
+    def generate_csv_reports(self, page_ids: List[str]) -> Tuple[int, int, int]:
+        """Check all pages, stream the results into the CSV reports and return the published/unpublished/failed counts"""
         generated_dir = 'generated'
-        if not os.path.exists(generated_dir):
-            os.makedirs(generated_dir)
+        os.makedirs(generated_dir, exist_ok=True)
         
-        # Published pages CSV
         published_file = os.path.join(generated_dir, 'published_pages.csv')
-        with open(published_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['page_id', 'slug']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for page in published:
-                writer.writerow(page)
-        
-        print(f"\n✅ Published pages CSV: {published_file}")
-        print(f"   ({len(published)} pages)")
-        
-        # Unpublished pages CSV
         unpublished_file = os.path.join(generated_dir, 'unpublished_pages.csv')
-        with open(unpublished_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['page_id', 'slug']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for page in unpublished:
-                writer.writerow(page)
         
+        with open(published_file, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as published_csv, \
+                open(unpublished_file, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as unpublished_csv:
+            # Plain csv writers - the columns are fixed, so rows are written as tuples
+            published_writer = csv.writer(published_csv)
+            published_writer.writerow(CSV_FIELDNAMES)
+            unpublished_writer = csv.writer(unpublished_csv)
+            unpublished_writer.writerow(CSV_FIELDNAMES)
+            
+            published_count, unpublished_count, failed_count = asyncio.run(
+                self.check_all_pages_async(page_ids, published_writer, unpublished_writer)
+            )
+        
+        print(f"\n✅ Published pages CSV: {published_file}")
+        print(f"   ({published_count} pages)")
         print(f"✅ Unpublished pages CSV: {unpublished_file}")
-        print(f"   ({len(unpublished)} pages)")
-
+        print(f"   ({unpublished_count} pages)")
+        if failed_count:
+            print(f"⚠️  {failed_count} pages could not be checked and are in neither report (see errors above)")
+        
+        return published_count, unpublished_count, failed_count
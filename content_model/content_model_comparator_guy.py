@@ -10,12 +10,36 @@ This module provides functionality to:
 """
 
 import os
+import sys
 import csv
+import hashlib
 import json
-from typing import Dict, List, Any, Set, Tuple
-from dotenv import load_dotenv
+from typing import Dict, Iterator, List, Any, Optional, Set, Tuple
 from content_model_reader import ContentfulModelReader
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CSV_HEADER = ('Difference Type', 'Content Type', 'Field', 'Property',
+              'Space 1 Value', 'Space 2 Value', 'Space 1 ID', 'Space 2 ID')
+# Write the export in 1 MiB blocks instead of the default ~8 KiB
+CSV_BUFFER_SIZE = 1024 * 1024
+# Property values of these types are written to the CSV as JSON
+JSON_CONTAINER_TYPES = (dict, list)
+# Field attributes the comparison reads
+FIELD_ATTRIBUTES = ('type', 'required', 'localized', 'disabled', 'omitted', 'name', 'link_type', 'items', 'validations')
+# Sentinel for attribute lookups where None is a valid value
+_MISSING = object()
+
+
+def _dump(value: Any) -> str:
+    """Serialize to compact JSON with sorted keys, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_SORT_KEYS).decode()
+    return json.dumps(value, default=str, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
 
 class ContentModelComparator:
 
@@ -26,8 +50,10 @@ class ContentModelComparator:
         self.space2_id = space2_id
     
     def _serialize_validation(self, validation) -> Dict[str, Any]:
-        if hasattr(validation, 'raw'):
-            return validation.raw
+        # Single lookup instead of hasattr() followed by the attribute access
+        raw = getattr(validation, 'raw', _MISSING)
+        if raw is not _MISSING:
+            return raw
         elif hasattr(validation, '__dict__'):
             result = {}
             for key, value in validation.__dict__.items():
@@ -37,33 +63,41 @@ class ContentModelComparator:
         else:
             return str(validation)
     
+    def _serialize_validations(self, validations) -> Optional[List[Any]]:
+        if not validations:
+            return None
+        # Validation order carries no meaning, so sort by canonical JSON to compare them as a set
+        return sorted((validation if isinstance(validation, dict) else self._serialize_validation(validation)
+                       for validation in validations), key=_dump)
+    
+    def _field_attributes(self, field) -> Dict[str, Any]:
+        # Read only the attributes the comparison uses, with getattr so properties and class attributes count too
+        attrs = {}
+        for name in FIELD_ATTRIBUTES:
+            value = getattr(field, name, _MISSING)
+            if value is not _MISSING:
+                attrs[name] = value
+        return attrs
+    
     def _get_field_definition(self, field) -> Dict[str, Any]:
+        get = self._field_attributes(field).get
+        
+        field_type = get('type')
         definition = {
-            'type': getattr(field, 'type', None),
-            'required': getattr(field, 'required', False),
-            'localized': getattr(field, 'localized', False),
-            'disabled': getattr(field, 'disabled', False),
-            'omitted': getattr(field, 'omitted', False)
+            'type': field_type,
+            'required': get('required', False),
+            'localized': get('localized', False),
+            'disabled': get('disabled', False),
+            'omitted': get('omitted', False)
         }
         
-        name = getattr(field, 'name', None)
+        name = get('name')
         if name:
             definition['name'] = name
-        if getattr(field, 'type', None) == 'Link':
-            definition['linkType'] = getattr(field, 'link_type', None)
-            validations = getattr(field, 'validations', None)
-            if validations:
-                serialized_validations = []
-                for validation in validations:
-                    if isinstance(validation, dict):
-                        serialized_validations.append(validation)
-                    else:
-                        serialized_validations.append(self._serialize_validation(validation))
-                if serialized_validations:
-                    definition['validations'] = serialized_validations
-        
-        if getattr(field, 'type', None) == 'Array':
-            items = getattr(field, 'items', None)
+        if field_type == 'Link':
+            definition['linkType'] = get('link_type')
+        elif field_type == 'Array':
+            items = get('items')
             if items:
                 if hasattr(items, 'raw'):
                     definition['items'] = items.raw
@@ -72,19 +106,31 @@ class ContentModelComparator:
                 else:
                     definition['items'] = str(items)
         
-        validations = getattr(field, 'validations', None)
-        if validations and 'validations' not in definition:
-            serialized_validations = []
-            for validation in validations:
-                if isinstance(validation, dict):
-                    serialized_validations.append(validation)
-                else:
-                    serialized_validations.append(self._serialize_validation(validation))
-            if serialized_validations:
-                definition['validations'] = serialized_validations
+        serialized_validations = self._serialize_validations(get('validations'))
+        if serialized_validations:
+            definition['validations'] = serialized_validations
             
         return definition
     
+    def _field_signature(self, field) -> bytes:
+        """Digest of everything _get_field_definition reads, without building the definition"""
+        get = self._field_attributes(field).get
+        items = get('items')
+        validations = get('validations')
+        payload = (
+            get('type'),
+            get('required', False),
+            get('localized', False),
+            get('disabled', False),
+            get('omitted', False),
+            get('name'),
+            get('link_type'),
+            getattr(items, 'raw', items),
+            # Most fields have no validations - don't build a list for them
+            sorted((getattr(validation, 'raw', validation) for validation in validations), key=_dump) if validations else None
+        )
+        return hashlib.blake2b(_dump(payload).encode('utf-8'), digest_size=16).digest()
+    
     def compare_models(self) -> Dict[str, Any]:
         print("\n📊 Running comparison...")
         print("\n=== Comparing content models ===")
@@ -98,31 +144,32 @@ class ContentModelComparator:
         types1 = {ct.id: ct for ct in self.model1}
         types2 = {ct.id: ct for ct in self.model2}
         
-        types1_ids = set(types1.keys())
-        types2_ids = set(types2.keys())
-        
-        missing_in_space2 = types1_ids - types2_ids
-        missing_in_space1 = types2_ids - types1_ids
+        # dict key views support set operations directly, no intermediate sets needed
+        missing_in_space2 = types1.keys() - types2.keys()
+        missing_in_space1 = types2.keys() - types1.keys()
         
         if missing_in_space2:
             differences['missing_types']['space2'] = list(missing_in_space2)
         if missing_in_space1:
             differences['missing_types']['space1'] = list(missing_in_space1)
         
-        common_types = types1_ids & types2_ids
+        common_types = types1.keys() & types2.keys()
         
         for type_id in common_types:
             ct1 = types1[type_id]
             ct2 = types2[type_id]
             
+            # Every compared property comes from the raw field definitions, so identical raw
+            # fields (e.g. an environment cloned from the other) can't produce a difference
+            raw_fields1 = getattr(ct1, 'raw', {}).get('fields')
+            if raw_fields1 is not None and raw_fields1 == getattr(ct2, 'raw', {}).get('fields'):
+                continue
+            
             fields1 = {f.id: f for f in ct1.fields}
             fields2 = {f.id: f for f in ct2.fields}
             
-            fields1_ids = set(fields1.keys())
-            fields2_ids = set(fields2.keys())
-            
-            missing_fields_in_space2 = fields1_ids - fields2_ids
-            missing_fields_in_space1 = fields2_ids - fields1_ids
+            missing_fields_in_space2 = fields1.keys() - fields2.keys()
+            missing_fields_in_space1 = fields2.keys() - fields1.keys()
             
             if missing_fields_in_space2 or missing_fields_in_space1:
                 if type_id not in differences['field_differences']:
@@ -136,83 +183,89 @@ class ContentModelComparator:
                 if missing_fields_in_space1:
                     differences['field_differences'][type_id]['missing_in_space1'] = list(missing_fields_in_space1)
             
-            common_fields = fields1_ids & fields2_ids
+            common_fields = fields1.keys() & fields2.keys()
             
             for field_id in common_fields:
                 field1 = fields1[field_id]
                 field2 = fields2[field_id]
                 
+                # Most fields are identical across spaces - matching digests mean the full
+                # definitions only need to be built for fields that actually changed
+                if self._field_signature(field1) == self._field_signature(field2):
+                    continue
+                
                 def1 = self._get_field_definition(field1)
                 def2 = self._get_field_definition(field2)
                 
-                if def1 != def2:
+                # Store only the (property, space 1 value, space 2 value) records that differ,
+                # so reports don't need to re-diff and the full definitions aren't retained
+                changes = [(key, def1.get(key), def2.get(key)) for key in def1.keys() | def2.keys()
+                           if def1.get(key) != def2.get(key)]
+                
+                if changes:
                     if type_id not in differences['definition_differences']:
                         differences['definition_differences'][type_id] = {}
                     
-                    differences['definition_differences'][type_id][field_id] = {
-                        'space1': def1,
-                        'space2': def2
-                    }
+                    differences['definition_differences'][type_id][field_id] = changes
         
         return differences
     
     def print_differences(self, differences: Dict[str, Any]) -> None:
-        print("\n" + "="*60)
-        print("CONTENT MODEL COMPARISON REPORT")
-        print("="*60)
+        # Collect the report and write it in one go rather than one print() per line
+        out: List[str] = []
+        add = out.append
+        add("\n" + "="*60)
+        add("CONTENT MODEL COMPARISON REPORT")
+        add("="*60)
         
         has_differences = False
         if differences['missing_types']['space1']:
             has_differences = True
-            print(f"\n📦 Content Types missing in Space 1 ({self.space1_id}):")
+            add(f"\n📦 Content Types missing in Space 1 ({self.space1_id}):")
             for ct in differences['missing_types']['space1']:
-                print(f"  - {ct}")
+                add(f"  - {ct}")
         
         if differences['missing_types']['space2']:
             has_differences = True
-            print(f"\n📦 Content Types missing in Space 2 ({self.space2_id}):")
+            add(f"\n📦 Content Types missing in Space 2 ({self.space2_id}):")
             for ct in differences['missing_types']['space2']:
-                print(f"  - {ct}")
+                add(f"  - {ct}")
         
         if differences['field_differences']:
             has_differences = True
-            print("\n📝 Field Differences:")
+            add("\n📝 Field Differences:")
             for type_id, field_diffs in differences['field_differences'].items():
-                print(f"\n  Content Type: {type_id}")
+                add(f"\n  Content Type: {type_id}")
                 if field_diffs['missing_in_space1']:
-                    print(f"    Missing in Space 1:")
+                    add(f"    Missing in Space 1:")
                     for field in field_diffs['missing_in_space1']:
-                        print(f"      - {field}")
+                        add(f"      - {field}")
                 if field_diffs['missing_in_space2']:
-                    print(f"    Missing in Space 2:")
+                    add(f"    Missing in Space 2:")
                     for field in field_diffs['missing_in_space2']:
-                        print(f"      - {field}")
+                        add(f"      - {field}")
         
         if differences['definition_differences']:
             has_differences = True
-            print("\n⚙️  Field Definition Differences:")
+            add("\n⚙️  Field Definition Differences:")
             for type_id, fields in differences['definition_differences'].items():
-                print(f"\n  Content Type: {type_id}")
-                for field_id, defs in fields.items():
-                    print(f"    Field: {field_id}")
-                    
-                    def1 = defs['space1']
-                    def2 = defs['space2']
+                add(f"\n  Content Type: {type_id}")
+                for field_id, changes in fields.items():
+                    add(f"    Field: {field_id}")
                     
-                    for key in set(def1.keys()) | set(def2.keys()):
-                        val1 = def1.get(key)
-                        val2 = def2.get(key)
-                        if val1 != val2:
-                            print(f"      {key}:")
-                            print(f"        Space 1: {val1}")
-                            print(f"        Space 2: {val2}")
+                    for key, val1, val2 in changes:
+                        add(f"      {key}:")
+                        add(f"        Space 1: {val1}")
+                        add(f"        Space 2: {val2}")
         
         if not has_differences:
-            print("\n✅ No differences found! Both content models are identical.")
+            add("\n✅ No differences found! Both content models are identical.")
         else:
-            print("\n" + "="*60)
-            print("END OF REPORT")
-            print("="*60)
+            add("\n" + "="*60)
+            add("END OF REPORT")
+            add("="*60)
+        
+        sys.stdout.write('\n'.join(out) + '\n')
     
     def get_differences_summary(self, differences: Dict[str, Any]) -> Dict[str, int]:
         summary = {
@@ -267,107 +320,59 @@ class ContentModelComparator:
         
         return total_differences
     
-    def export_to_csv(self, differences: Dict[str, Any], filename: str = 'content_model_differences.csv') -> str:
-        print("\n💾 Exporting results...")
-        generated_dir = 'generated'
-        if not os.path.exists(generated_dir):
-            os.makedirs(generated_dir)
+    def _iter_rows(self, differences: Dict[str, Any]) -> Iterator[Tuple[str, ...]]:
+        """Yield one CSV row per difference, in CSV_HEADER column order"""
+        space1_id, space2_id = self.space1_id, self.space2_id
         
-        filepath = os.path.join(generated_dir, filename)
-        rows = []
+        # Validation lists are often shared between fields, so serialize each object once
+        serialized: Dict[int, str] = {}
+        
+        def to_cell(value: Any) -> str:
+            if not isinstance(value, JSON_CONTAINER_TYPES):
+                return str(value)
+            cell = serialized.get(id(value))
+            if cell is None:
+                cell = serialized[id(value)] = _dump(value)
+            return cell
         
         for ct in differences['missing_types']['space1']:
-            rows.append({
-                'Difference Type': 'Missing Content Type',
-                'Content Type': ct,
-                'Field': '',
-                'Property': '',
-                'Space 1 Value': 'Missing',
-                'Space 2 Value': 'Present',
-                'Space 1 ID': self.space1_id,
-                'Space 2 ID': self.space2_id
-            })
+            yield ('Missing Content Type', ct, '', '', 'Missing', 'Present', space1_id, space2_id)
         
         for ct in differences['missing_types']['space2']:
-            rows.append({
-                'Difference Type': 'Missing Content Type',
-                'Content Type': ct,
-                'Field': '',
-                'Property': '',
-                'Space 1 Value': 'Present',
-                'Space 2 Value': 'Missing',
-                'Space 1 ID': self.space1_id,
-                'Space 2 ID': self.space2_id
-            })
+            yield ('Missing Content Type', ct, '', '', 'Present', 'Missing', space1_id, space2_id)
         
         for type_id, field_diffs in differences['field_differences'].items():
             for field in field_diffs['missing_in_space1']:
-                rows.append({
-                    'Difference Type': 'Missing Field',
-                    'Content Type': type_id,
-                    'Field': field,
-                    'Property': '',
-                    'Space 1 Value': 'Missing',
-                    'Space 2 Value': 'Present',
-                    'Space 1 ID': self.space1_id,
-                    'Space 2 ID': self.space2_id
-                })
+                yield ('Missing Field', type_id, field, '', 'Missing', 'Present', space1_id, space2_id)
             
             for field in field_diffs['missing_in_space2']:
-                rows.append({
-                    'Difference Type': 'Missing Field',
-                    'Content Type': type_id,
-                    'Field': field,
-                    'Property': '',
-                    'Space 1 Value': 'Present',
-                    'Space 2 Value': 'Missing',
-                    'Space 1 ID': self.space1_id,
-                    'Space 2 ID': self.space2_id
-                })
+                yield ('Missing Field', type_id, field, '', 'Present', 'Missing', space1_id, space2_id)
         
         for type_id, fields in differences['definition_differences'].items():
-            for field_id, defs in fields.items():
-                def1 = defs['space1']
-                def2 = defs['space2']
-                
-                all_keys = set(def1.keys()) | set(def2.keys())
-                for key in all_keys:
-                    val1 = def1.get(key)
-                    val2 = def2.get(key)
-                    if val1 != val2:
-                        val1_str = json.dumps(val1) if isinstance(val1, (dict, list)) else str(val1)
-                        val2_str = json.dumps(val2) if isinstance(val2, (dict, list)) else str(val2)
-                        
-                        rows.append({
-                            'Difference Type': 'Field Definition',
-                            'Content Type': type_id,
-                            'Field': field_id,
-                            'Property': key,
-                            'Space 1 Value': val1_str,
-                            'Space 2 Value': val2_str,
-                            'Space 1 ID': self.space1_id,
-                            'Space 2 ID': self.space2_id
-                        })
-        
-        if rows:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['Difference Type', 'Content Type', 'Field', 'Property', 
-                             'Space 1 Value', 'Space 2 Value', 'Space 1 ID', 'Space 2 ID']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(rows)
-            
+            for field_id, changes in fields.items():
+                for key, val1, val2 in changes:
+                    yield ('Field Definition', type_id, field_id, key,
+                           to_cell(val1), to_cell(val2), space1_id, space2_id)
+    
+    def export_to_csv(self, differences: Dict[str, Any], filename: str = 'content_model_differences.csv') -> str:
+        print("\n💾 Exporting results...")
+        generated_dir = 'generated'
+        os.makedirs(generated_dir, exist_ok=True)
+        
+        filepath = os.path.join(generated_dir, filename)
+        total = 0
+        
+        with open(filepath, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_HEADER)
+            for row in self._iter_rows(differences):
+                writer.writerow(row)
+                total += 1
+        
+        if total:
             print(f"\n✅ Differences exported to: {filepath}")
-            print(f"   Total differences: {len(rows)}")
+            print(f"   Total differences: {total}")
         else:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['Difference Type', 'Content Type', 'Field', 'Property', 
-                             'Space 1 Value', 'Space 2 Value', 'Space 1 ID', 'Space 2 ID']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-            
             print(f"\n✅ No differences found! Empty CSV created: {filepath}")
         
         return filepath
-
-
@@ -5,45 +5,126 @@ ContentfulModelReader - A class for reading content models from Contentful space
 This module provides functionality to:
 - Connect to Contentful Management API
 - Fetch content types from specified spaces and environments
+- Cache fetched models on disk, revalidated with the API's ETag
 - Handle authentication and error management
 """
 
 from contentful_management import ContentType, Space, Client
 import os
 import json
+import requests
+from functools import lru_cache
 from typing import List, Any, Dict, Optional
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MANAGEMENT_API_URL = 'https://api.contentful.com'
+CACHE_DIR = '.cache'
+# Largest page Contentful serves for content types (the default is 100)
+CONTENT_TYPES_LIMIT = 1000
+# Write saved models in 1 MiB blocks instead of the default ~8 KiB
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def _load_env(path: str = '.env') -> bool:
+    """Parse the env file once per process, however many readers are created"""
+    return load_dotenv(path)
+
 
 class ContentfulModelReader:
 
     def __init__(self, space_id_env: str, environment_id_env: str):
-        load_dotenv('.env')
+        _load_env('.env')
         self.space_id = os.getenv(space_id_env)
         self.environment_id = os.getenv(environment_id_env)
         self.management_token = os.getenv('CONTENTFUL_MANAGEMENT_TOKEN')
         self.client: Client = Client(self.management_token)
+        self._content_types: Optional[List[ContentType]] = None
     
     def fetch_content_model(self) -> List[ContentType]:
+        if self._content_types is not None:
+            return self._content_types
+        
         try:
-            space: Space = self.client.spaces().find(self.space_id)
-            environment = space.environments().find(self.environment_id)
-            content_types: List[ContentType] = environment.content_types().all()
+            etag = self._fetch_etag()
+            content_types = self._load_cached_model(etag)
             
-            print(f"✅ Fetched {len(content_types)} content types from {self.space_id}/{self.environment_id}")
+            if content_types is None:
+                space: Space = self.client.spaces().find(self.space_id)
+                environment = space.environments().find(self.environment_id)
+                content_types = environment.content_types().all({'limit': CONTENT_TYPES_LIMIT})
+                print(f"✅ Fetched {len(content_types)} content types from {self.space_id}/{self.environment_id}")
+                self._save_cached_model(etag, content_types)
+            else:
+                print(f"✅ Loaded {len(content_types)} content types for {self.space_id}/{self.environment_id} from cache")
             
             self.save_model(content_types)
             
+            self._content_types = content_types
             return content_types
             
         except Exception as e:
             print(f"❌ Error fetching content model from {self.space_id}/{self.environment_id}: {str(e)}")
             raise
     
+    def _cache_path(self) -> str:
+        return os.path.join(CACHE_DIR, f"{self.space_id}_{self.environment_id}.json")
+    
+    def _read_cache(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._cache_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _fetch_etag(self) -> Optional[str]:
+        """Get the current ETag of the content types collection with a cheap HEAD request"""
+        url = f"{MANAGEMENT_API_URL}/spaces/{self.space_id}/environments/{self.environment_id}/content_types"
+        headers = {'Authorization': f'Bearer {self.management_token}'}
+        cache = self._read_cache()
+        if cache and cache.get('etag'):
+            headers['If-None-Match'] = cache['etag']
+        
+        try:
+            # Same query as the GET below, otherwise the ETag describes a different (100 item) page
+            response = requests.head(url, headers=headers, params={'limit': CONTENT_TYPES_LIMIT}, timeout=10)
+        except requests.RequestException:
+            return None
+        
+        if response.status_code == 304:
+            return cache['etag']
+        if response.ok:
+            return response.headers.get('ETag')
+        return None
+    
+    def _load_cached_model(self, etag: Optional[str]) -> Optional[List[ContentType]]:
+        if not etag:
+            return None
+        
+        cache = self._read_cache()
+        if not cache or cache.get('etag') != etag:
+            return None
+        
+        return [ContentType(item, client=self.client) for item in cache.get('items', [])]
+    
+    def _save_cached_model(self, etag: Optional[str], model: List[ContentType]) -> None:
+        # Without an ETag there is no way to tell later whether the cache is stale
+        if not etag:
+            return
+        
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        
+        with open(self._cache_path(), 'w', encoding='utf-8') as f:
+            json.dump({'etag': etag, 'items': [content_type.raw for content_type in model]}, f, ensure_ascii=False)
+    
     def save_model(self, model: List[ContentType]) -> str:
         generated_dir: str = 'generated'
-        if not os.path.exists(generated_dir):
-            os.makedirs(generated_dir)
+        os.makedirs(generated_dir, exist_ok=True)
 
         filename: str = f"content_model_{self.space_id}_{self.environment_id}.json"
         filepath: str = os.path.join(generated_dir, filename)
@@ -54,8 +135,15 @@ class ContentfulModelReader:
 
         raw_data.sort(key=lambda ct: ct.get('name'))
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(raw_data, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            # orjson writes UTF-8 bytes directly (no ASCII escaping, like ensure_ascii=False)
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(raw_data, option=orjson.OPT_INDENT_2))
+        else:
+            # Serialize in one call and hand the whole document to a single write
+            payload = json.dumps(raw_data, indent=2, ensure_ascii=False)
+            with open(filepath, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(payload)
         
         print(f"Raw content model saved: {filepath}")
         return filepath
@@ -9,195 +9,414 @@ This module provides functionality to:
 - Export results to HTML files
 """
 
+from __future__ import annotations
+
+import hashlib
 import json
 import os
-from datetime import datetime
-from contentful_management import ContentType, ContentTypeField
-from contentful_management.content_type_field_validation import ContentTypeFieldValidation
+import time
+from operator import attrgetter
+from string import Template
+from typing import TYPE_CHECKING, TextIO
+
+if TYPE_CHECKING:
+    # Only used in annotations; importing the SDK is left to the code that fetches the models
+    from contentful_management import ContentType, ContentTypeField
+    from contentful_management.content_type_field_validation import ContentTypeFieldValidation
+
+
+# Write the page in 1 MiB blocks instead of the default ~8 KiB
+HTML_BUFFER_SIZE = 1024 * 1024
+# Sentinel for attribute lookups where None is a valid value
+_MISSING = object()
+# Rich text node types whose linkContentType restrictions are compared separately
+LINK_NODE_TYPES = ('embedded-entry-block', 'embedded-entry-inline', 'entry-hyperlink')
+EMPTY_LINKS: frozenset[str] = frozenset()
+# Fixed-shape property blocks; one template per variant instead of conditional appends
+CONTENT_TYPE_DETAILS_TEMPLATE = (
+    '<div class="field-property"><span class="property-name">ID:</span> <span class="property-value">{id}</span></div>\n'
+    '<div class="field-property"><span class="property-name">Fields:</span> <span class="property-value">{field_count}</span></div>\n'
+)
+CONTENT_TYPE_DETAILS_WITH_DESCRIPTION_TEMPLATE = (
+    '<div class="field-property"><span class="property-name">ID:</span> <span class="property-value">{id}</span></div>\n'
+    '<div class="field-property"><span class="property-name">Description:</span> <span class="property-value">{description}</span></div>\n'
+    '<div class="field-property"><span class="property-name">Fields:</span> <span class="property-value">{field_count}</span></div>\n'
+)
+FIELD_PROPERTIES_TEMPLATE = (
+    '<div class="field-property"><span class="property-name">Type:</span> <span class="property-value">{type}</span></div>\n'
+    '<div class="field-property"><span class="property-name">Required:</span> <span class="property-value">{required}</span></div>\n'
+    '<div class="field-property"><span class="property-name">Localized:</span> <span class="property-value">{localized}</span></div>\n'
+)
+FIELD_VALIDATIONS_TEMPLATE = '<div class="field-property"><span class="property-name">Validations:</span> <span class="property-value">{count}</span></div>\n'
+# Page header and styles; only the two space IDs vary between pages
+HTML_HEADER_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Content Model Diff: $space1_id vs $space2_id</title>
+    <style>
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            margin: 0;
+            padding: 20px;
+            background-color: #f8f9fa;
+            line-height: 1.6;
+        }
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+            background: white;
+            border-radius: 8px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+            padding: 30px;
+        }
+        h1 {
+            color: #333;
+            text-align: center;
+            margin-bottom: 30px;
+            padding-bottom: 20px;
+            border-bottom: 2px solid #e9ecef;
+        }
+        h2 {
+            color: #495057;
+            margin-top: 40px;
+            margin-bottom: 20px;
+            padding-left: 10px;
+            border-left: 4px solid #007bff;
+        }
+        h3 {
+            color: #6c757d;
+            margin-top: 30px;
+            margin-bottom: 15px;
+        }
+        .summary {
+            background: #f8f9fa;
+            padding: 20px;
+            border-radius: 6px;
+            margin-bottom: 30px;
+        }
+        .summary-item {
+            margin: 10px 0;
+            padding: 8px 12px;
+            border-radius: 4px;
+        }
+        .added {
+            background-color: #d4edda;
+            color: #155724;
+            border-left: 4px solid #28a745;
+        }
+        .removed {
+            background-color: #f8d7da;
+            color: #721c24;
+            border-left: 4px solid #dc3545;
+        }
+        .modified {
+            background-color: #fff3cd;
+            color: #856404;
+            border-left: 4px solid #ffc107;
+        }
+        .unchanged {
+            background-color: #e9ecef;
+            color: #495057;
+            border-left: 4px solid #6c757d;
+        }
+        .content-type {
+            margin: 20px 0;
+            border: 1px solid #dee2e6;
+            border-radius: 6px;
+            overflow: hidden;
+        }
+        .content-type-header {
+            padding: 15px 20px;
+            font-weight: 600;
+            font-size: 18px;
+        }
+        .content-type-body {
+            padding: 20px;
+        }
+        .field-comparison {
+            display: grid;
+            grid-template-columns: 1fr 1fr;
+            gap: 20px;
+            margin: 15px 0;
+        }
+        .field-side {
+            border: 1px solid #dee2e6;
+            border-radius: 4px;
+            padding: 15px;
+        }
+        .field-side h4 {
+            margin: 0 0 10px 0;
+            color: #495057;
+        }
+        .field-property {
+            margin: 5px 0;
+            font-family: 'Monaco', 'Menlo', monospace;
+            font-size: 14px;
+        }
+        .property-name {
+            font-weight: 600;
+            color: #6f42c1;
+        }
+        .property-value {
+            color: #28a745;
+        }
+        .no-differences {
+            text-align: center;
+            color: #28a745;
+            font-size: 18px;
+            margin: 40px 0;
+            padding: 20px;
+            background: #d4edda;
+            border-radius: 6px;
+        }
+        .space-label {
+            font-size: 14px;
+            color: #6c757d;
+            font-weight: normal;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>Content Model Comparison</h1>
+        <div style="text-align: center; margin-bottom: 30px;">
+            <strong>Space 1:</strong> $space1_id &nbsp;&nbsp;&nbsp; <strong>Space 2:</strong> $space2_id
+        </div>
+""")
+
+# Escapes the characters that matter in HTML text and attributes in one C-level pass
+HTML_ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'})
+
+
+def _escape(value: object) -> str:
+    """Escape editor-controlled text (names, descriptions, validation values) for the page."""
+    return str(value).translate(HTML_ESCAPE_TABLE)
+
+
+def _partition(a_sorted: list[str], b_sorted: list[str]) -> tuple[list[str], list[str], list[str]]:
+    """Split two sorted key lists into (only in a, only in b, in both) with a single merge pass."""
+    only_a: list[str] = []
+    only_b: list[str] = []
+    both: list[str] = []
+    i = j = 0
+    while i < len(a_sorted) and j < len(b_sorted):
+        a, b = a_sorted[i], b_sorted[j]
+        if a == b:
+            both.append(a)
+            i += 1
+            j += 1
+        elif a < b:
+            only_a.append(a)
+            i += 1
+        else:
+            only_b.append(b)
+            j += 1
+    only_a.extend(a_sorted[i:])
+    only_b.extend(b_sorted[j:])
+    return only_a, only_b, both
 
 
 class DiffPageBuilder:
 
-    def __init__(self, model1: list[ContentType], model2: list[ContentType], space1_id: str, space2_id: str):
+    def __init__(self, model1: list[ContentType], model2: list[ContentType], space1_id: str, space2_id: str,
+                 include_unchanged: bool = False):
         self.model1: list[ContentType] = model1
         self.model2: list[ContentType] = model2
         self.space1_id: str = space1_id
         self.space2_id: str = space2_id
+        # Render a full card per identical type instead of one collapsed list
+        self.include_unchanged: bool = include_unchanged
+        # Field lookups per content type, keyed by id() of the content type (both models live as long as self)
+        self._fields_by_id_cache: dict[int, dict[str, ContentTypeField]] = {}
+        # Field signatures, keyed the same way, so repeated diffs reuse them
+        self._field_signature_cache: dict[int, tuple] = {}
+        # Extracted validation data per field, keyed the same way
+        self._validation_summary_cache: dict[int, tuple] = {}
 
     def create_html_diff(self) -> str:
         print("\n🎨 Building HTML diff page...")
+        # One timestamp for both the footer and the file name
+        now = time.localtime()
+
+        get_name = attrgetter('name')
+        types1: dict[str, ContentType] = dict(zip(map(get_name, self.model1), self.model1))
+        types2: dict[str, ContentType] = dict(zip(map(get_name, self.model2), self.model2))
+
+        missing_in_space2, missing_in_space1, common_names = _partition(sorted(types1), sorted(types2))
+
+        # Sections are written straight to a temporary file as they are generated, which only replaces
+        # the real file once the page is complete, so a failure never leaves a truncated page behind
+        filepath = self._html_file_path(now)
+        temp_filepath = filepath + '.tmp'
+        try:
+            with open(temp_filepath, 'w', encoding='utf-8', buffering=HTML_BUFFER_SIZE) as out:
+                out.write(self._generate_html_header())
+                self._generate_summary_section(out, missing_in_space1, missing_in_space2, common_names)
+                self._generate_content_types_section(out, types1, types2, missing_in_space1, missing_in_space2, common_names)
+                out.write(self._generate_html_footer(now))
+            os.replace(temp_filepath, filepath)
+        except BaseException:
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+            raise
 
-        types1: dict[str, ContentType] = {ct.name: ct for ct in self.model1}
-        types2: dict[str, ContentType] = {ct.name: ct for ct in self.model2}
-
-        names1 = set(types1.keys())
-        names2 = set(types2.keys())
-
-        missing_in_space2 = names1 - names2
-        missing_in_space1 = names2 - names1
-        common_names = names1 & names2
-
-        html_content = self._generate_html_header()
-        html_content += self._generate_summary_section(missing_in_space1, missing_in_space2, common_names)
-        html_content += self._generate_content_types_section(types1, types2, missing_in_space1, missing_in_space2, common_names)
-        html_content += self._generate_html_footer()
-
-        return self._save_html_file(html_content)
+        print(f"HTML diff page created: {filepath}")
+        print(f"file://{os.path.abspath(filepath)}")
+        return filepath
 
-    def _generate_summary_section(self, missing_in_space1: set[str], missing_in_space2: set[str], common_names: set[str]) -> str:
+    def _generate_summary_section(self, out: TextIO, missing_in_space1: list[str], missing_in_space2: list[str],
+                                  common_names: list[str]) -> None:
         total_types = len(missing_in_space1) + len(missing_in_space2) + len(common_names)
 
-        html = '<div class="summary">\n'
-        html += '<h2>📊 Summary</h2>\n'
-        html += f'<div class="summary-item unchanged">Total Content Types: {total_types}</div>\n'
+        out.write('<div class="summary">\n')
+        out.write('<h2>📊 Summary</h2>\n')
+        out.write(f'<div class="summary-item unchanged">Total Content Types: {total_types}</div>\n')
 
         if missing_in_space2:
-            html += f'<div class="summary-item removed">Missing in Space 2: {len(missing_in_space2)} types</div>\n'
+            out.write(f'<div class="summary-item removed">Missing in Space 2: {len(missing_in_space2)} types</div>\n')
 
         if missing_in_space1:
-            html += f'<div class="summary-item added">Missing in Space 1: {len(missing_in_space1)} types</div>\n'
-
-        html += f'<div class="summary-item unchanged">Common Types: {len(common_names)} types</div>\n'
-        html += '</div>\n'
-
-        return html
-
-    def _generate_content_types_section(self, types1: dict[str, ContentType], types2: dict[str, ContentType],
-                                      missing_in_space1: set[str], missing_in_space2: set[str],
-                                      common_names: set[str]) -> str:
-        html = '<h2>📋 Content Types</h2>\n'
+            out.write(f'<div class="summary-item added">Missing in Space 1: {len(missing_in_space1)} types</div>\n')
+
+        out.write(f'<div class="summary-item unchanged">Common Types: {len(common_names)} types</div>\n')
+        out.write('</div>\n')
+
+    def _generate_content_types_section(self, out: TextIO, types1: dict[str, ContentType], types2: dict[str, ContentType],
+                                      missing_in_space1: list[str], missing_in_space2: list[str],
+                                      common_names: list[str]) -> None:
+        out.write('<h2>📋 Content Types</h2>\n')
+
+        # Diff each common type once; the same results drive the check below and the common types section
+        common_differences: dict[str, tuple[str, str]] = {}
+        for name in common_names:
+            ct1, ct2 = types1[name], types2[name]
+            digest1 = self._fields_digest(ct1)
+            # Identical field definitions can't produce differences, so skip the field-by-field diff
+            if digest1 is not None and digest1 == self._fields_digest(ct2):
+                common_differences[name] = ('', '')
+            else:
+                common_differences[name] = self._diff_common_type(ct1, ct2)
 
         # Check if there are any differences at all
         has_missing_types = missing_in_space1 or missing_in_space2
-        has_modified_types = any(self._compare_content_types(types1[name], types2[name]) for name in common_names)
+        has_modified_types = any(differences for _, differences in common_differences.values())
 
         # If no differences at all, show celebration message
         if not has_missing_types and not has_modified_types:
-            html += '<div class="no-differences">🎉 No differences found! Content models are identical.</div>\n'
-            return html
+            out.write('<div class="no-differences">🎉 No differences found! Content models are identical.</div>\n')
+            return
 
         # Show missing types
-        html += self._generate_missing_types_section(types1, types2, missing_in_space1, missing_in_space2)
+        self._generate_missing_types_section(out, types1, types2, missing_in_space1, missing_in_space2)
 
         # Show common types (modified and identical)
-        html += self._generate_common_types_section(types1, types2, common_names)
-
-        return html
+        self._generate_common_types_section(out, types1, types2, common_differences)
 
-    def _generate_missing_types_section(self, types1: dict[str, ContentType], types2: dict[str, ContentType],
-                                      missing_in_space1: set[str], missing_in_space2: set[str]) -> str:
+    def _generate_missing_types_section(self, out: TextIO, types1: dict[str, ContentType], types2: dict[str, ContentType],
+                                      missing_in_space1: list[str], missing_in_space2: list[str]) -> None:
         """Generate HTML for content types that are missing in one space or the other."""
-        html = ''
-
         # Missing in space 2 (only in space 1)
         if missing_in_space2:
-            html += '<h3>❌ Missing in Space 2</h3>\n'
-            for name in sorted(missing_in_space2):
+            out.write('<h3>❌ Missing in Space 2</h3>\n')
+            for name in missing_in_space2:
                 ct = types1[name]
-                html += f'<div class="content-type">\n'
-                html += f'<div class="content-type-header removed">{name}</div>\n'
-                html += f'<div class="content-type-body">{self._format_content_type_details(ct)}</div>\n'
-                html += '</div>\n'
+                out.write(f'<div class="content-type">\n')
+                out.write(f'<div class="content-type-header removed">{_escape(name)}</div>\n')
+                out.write(f'<div class="content-type-body">{self._format_content_type_details(ct)}</div>\n')
+                out.write('</div>\n')
 
         # Missing in space 1 (only in space 2)
         if missing_in_space1:
-            html += '<h3>✅ Missing in Space 1</h3>\n'
-            for name in sorted(missing_in_space1):
+            out.write('<h3>✅ Missing in Space 1</h3>\n')
+            for name in missing_in_space1:
                 ct = types2[name]
-                html += f'<div class="content-type">\n'
-                html += f'<div class="content-type-header added">{name}</div>\n'
-                html += f'<div class="content-type-body">{self._format_content_type_details(ct)}</div>\n'
-                html += '</div>\n'
-
-        return html
-
-    def _generate_common_types_section(self, types1: dict[str, ContentType], types2: dict[str, ContentType],
-                                     common_names: set[str]) -> str:
-        if not common_names:
-            return ''
-
-        html = '<h3>🔄 Common Types</h3>\n'
-
-        for name in sorted(common_names):
-            ct1 = types1[name]
-            ct2 = types2[name]
-            differences = self._compare_content_types(ct1, ct2)
-
-            if differences:
+                out.write(f'<div class="content-type">\n')
+                out.write(f'<div class="content-type-header added">{_escape(name)}</div>\n')
+                out.write(f'<div class="content-type-body">{self._format_content_type_details(ct)}</div>\n')
+                out.write('</div>\n')
+
+    def _generate_common_types_section(self, out: TextIO, types1: dict[str, ContentType], types2: dict[str, ContentType],
+                                     common_differences: dict[str, tuple[str, str]]) -> None:
+        """Generate HTML for common content types from their precomputed differences, in name order."""
+        if not common_differences:
+            return
+
+        out.write('<h3>🔄 Common Types</h3>\n')
+
+        unchanged_names: list[str] = []
+        for name, (diff_summary, differences) in common_differences.items():
+            if not differences and not self.include_unchanged:
+                unchanged_names.append(name)
+            elif differences:
                 # Modified content type
-                diff_summary = self._get_difference_summary(ct1, ct2)
-                html += f'<div class="content-type">\n'
-                html += f'<div class="content-type-header modified">{name} <span class="space-label">({diff_summary})</span></div>\n'
-                html += f'<div class="content-type-body">{differences}</div>\n'
-                html += '</div>\n'
+                out.write(f'<div class="content-type">\n')
+                out.write(f'<div class="content-type-header modified">{_escape(name)} <span class="space-label">({diff_summary})</span></div>\n')
+                out.write(f'<div class="content-type-body">{differences}</div>\n')
+                out.write('</div>\n')
             else:
                 # Identical content type
-                html += f'<div class="content-type">\n'
-                html += f'<div class="content-type-header unchanged">{name} <span class="space-label">(identical)</span></div>\n'
-                html += '</div>\n'
-
-        return html
-
-    def _get_difference_summary(self, ct1: ContentType, ct2: ContentType) -> str:
-        fields1: dict[str, ContentTypeField] = {f.id: f for f in ct1.fields}
-        fields2: dict[str, ContentTypeField] = {f.id: f for f in ct2.fields}
-
-        field_ids1 = set(fields1.keys())
-        field_ids2 = set(fields2.keys())
-
-        missing_in_1 = field_ids2 - field_ids1
-        missing_in_2 = field_ids1 - field_ids2
-        common_fields = field_ids1 & field_ids2
-
-        modified_count = 0
-        for field_id in common_fields:
-            if self._fields_differ(fields1[field_id], fields2[field_id]):
-                modified_count += 1
-
-        summary_parts = []
-        if missing_in_2:
-            summary_parts.append(f"{len(missing_in_2)} missing in Space 2")
-        if missing_in_1:
-            summary_parts.append(f"{len(missing_in_1)} missing in Space 1")
-        if modified_count:
-            summary_parts.append(f"{modified_count} modified")
-
-        return ", ".join(summary_parts) if summary_parts else "has differences"
+                out.write(f'<div class="content-type">\n')
+                out.write(f'<div class="content-type-header unchanged">{_escape(name)} <span class="space-label">(identical)</span></div>\n')
+                out.write('</div>\n')
+
+        if unchanged_names:
+            # Large stable models would otherwise produce one card per identical type
+            out.write(f'<details class="content-type">\n')
+            out.write(f'<summary class="content-type-header unchanged">{len(unchanged_names)} identical types</summary>\n')
+            out.write('<ul class="content-type-body">\n')
+            out.write(''.join(f'<li>{_escape(name)}</li>\n' for name in unchanged_names))
+            out.write('</ul>\n')
+            out.write('</details>\n')
+
+    def _fields_digest(self, content_type: ContentType) -> bytes | None:
+        """Digest of the raw field definitions, or None when the content type has no raw data."""
+        raw = getattr(content_type, 'raw', None)
+        if not isinstance(raw, dict) or 'fields' not in raw:
+            return None
+        return hashlib.blake2b(json.dumps(raw['fields'], sort_keys=True, default=str).encode('utf-8'),
+                               digest_size=16).digest()
+
+    def _fields_by_id(self, content_type: ContentType) -> dict[str, ContentTypeField]:
+        """Map field IDs to fields in ID order, built once per content type."""
+        fields = self._fields_by_id_cache.get(id(content_type))
+        if fields is None:
+            # Sorted once here so callers can partition the keys without sorting them again
+            fields = self._fields_by_id_cache[id(content_type)] = {
+                f.id: f for f in sorted(content_type.fields, key=attrgetter('id'))
+            }
+        return fields
 
     def _format_content_type_details(self, content_type: ContentType) -> str:
         """Format content type details for display."""
-        html = f'<div class="field-property"><span class="property-name">ID:</span> <span class="property-value">{content_type.id}</span></div>\n'
+        field_count = len(content_type.fields)
         if content_type.description:
-            html += f'<div class="field-property"><span class="property-name">Description:</span> <span class="property-value">{content_type.description}</span></div>\n'
-        html += f'<div class="field-property"><span class="property-name">Fields:</span> <span class="property-value">{len(content_type.fields)}</span></div>\n'
-        return html
+            return CONTENT_TYPE_DETAILS_WITH_DESCRIPTION_TEMPLATE.format(
+                id=_escape(content_type.id), description=_escape(content_type.description), field_count=field_count)
+        return CONTENT_TYPE_DETAILS_TEMPLATE.format(id=_escape(content_type.id), field_count=field_count)
 
-    def _compare_content_types(self, ct1: ContentType, ct2: ContentType) -> str:
-        """Compare two content types and return HTML showing differences."""
-        fields1: dict[str, ContentTypeField] = {f.id: f for f in ct1.fields}
-        fields2: dict[str, ContentTypeField] = {f.id: f for f in ct2.fields}
+    def _diff_common_type(self, ct1: ContentType, ct2: ContentType) -> tuple[str, str]:
+        """Compare two content types in one pass and return (difference summary, HTML showing differences)."""
+        fields1 = self._fields_by_id(ct1)
+        fields2 = self._fields_by_id(ct2)
 
-        field_ids1 = set(fields1.keys())
-        field_ids2 = set(fields2.keys())
+        missing_in_2, missing_in_1, common_fields = _partition(list(fields1), list(fields2))
 
-        missing_in_1 = field_ids2 - field_ids1
-        missing_in_2 = field_ids1 - field_ids2
-        common_fields = field_ids1 & field_ids2
-
-        html = ''
+        parts: list[str] = []
 
         # Show missing fields
         if missing_in_2:
-            html += f'<h4>Fields missing in Space 2:</h4>\n'
-            for field_id in sorted(missing_in_2):
+            parts.append(f'<h4>Fields missing in Space 2:</h4>\n')
+            for field_id in missing_in_2:
                 field = fields1[field_id]
-                html += f'<div class="removed" style="margin: 5px 0; padding: 8px;">{field.name} ({field.type})</div>\n'
+                parts.append(f'<div class="removed" style="margin: 5px 0; padding: 8px;">{_escape(field.name)} ({field.type})</div>\n')
 
         if missing_in_1:
-            html += f'<h4>Fields missing in Space 1:</h4>\n'
-            for field_id in sorted(missing_in_1):
+            parts.append(f'<h4>Fields missing in Space 1:</h4>\n')
+            for field_id in missing_in_1:
                 field = fields2[field_id]
-                html += f'<div class="added" style="margin: 5px 0; padding: 8px;">{field.name} ({field.type})</div>\n'
+                parts.append(f'<div class="added" style="margin: 5px 0; padding: 8px;">{_escape(field.name)} ({field.type})</div>\n')
 
         # Compare common fields
         modified_fields = []
@@ -208,58 +427,53 @@ class DiffPageBuilder:
                 modified_fields.append((field_id, field1, field2))
 
         if modified_fields:
-            html += f'<h4>Modified fields:</h4>\n'
+            parts.append(f'<h4>Modified fields:</h4>\n')
             for field_id, field1, field2 in modified_fields:
-                html += f'<div style="margin: 15px 0; padding: 15px; border: 1px solid #dee2e6; border-radius: 6px;">\n'
-                html += f'<h4 style="margin: 0 0 10px 0; color: #495057;">Field: {field1.name}</h4>\n'
-                html += self._format_field_differences(field1, field2)
-                html += '</div>\n'
+                parts.append(f'<div style="margin: 15px 0; padding: 15px; border: 1px solid #dee2e6; border-radius: 6px;">\n')
+                parts.append(f'<h4 style="margin: 0 0 10px 0; color: #495057;">Field: {_escape(field1.name)}</h4>\n')
+                parts.append(self._format_field_differences(field1, field2))
+                parts.append('</div>\n')
 
-        return html
+        summary_parts = []
+        if missing_in_2:
+            summary_parts.append(f"{len(missing_in_2)} missing in Space 2")
+        if missing_in_1:
+            summary_parts.append(f"{len(missing_in_1)} missing in Space 1")
+        if modified_fields:
+            summary_parts.append(f"{len(modified_fields)} modified")
+
+        summary = ", ".join(summary_parts) if summary_parts else "has differences"
+        return summary, ''.join(parts)
 
     def _fields_differ(self, field1: ContentTypeField, field2: ContentTypeField) -> bool:
         """Check if two fields are different."""
-        # Compare key properties
-        if (field1.type != field2.type or
-            field1.required != field2.required or
-            field1.localized != field2.localized or
-            field1.disabled != field2.disabled or
-            field1.omitted != field2.omitted or
-            field1.name != field2.name):
-            return True
-
-        # Compare validations by content, not object reference
-        if not self._validations_are_equal(field1.validations, field2.validations):
-            return True
-
-        # Compare Array field items (for Link validations)
-        if hasattr(field1, 'items') and hasattr(field2, 'items'):
-            if field1.items != field2.items:
-                return True
-
-        return False
-
-    def _validations_are_equal(self, validations1: list[ContentTypeFieldValidation] | None,
-                              validations2: list[ContentTypeFieldValidation] | None) -> bool:
-        """Compare two validation lists by their content, not object references."""
-        val1: list[ContentTypeFieldValidation] = validations1 or []
-        val2: list[ContentTypeFieldValidation] = validations2 or []
-
-        if len(val1) != len(val2):
+        if field1 is field2:
             return False
-
-        if len(val1) == 0:
+        # Cheap scalar properties first; validations are only serialized when these all match
+        if self._scalar_key(field1) != self._scalar_key(field2):
             return True
-
-        raw1: list[dict[str, str | list[str]]] = [v.raw for v in val1]
-        raw2: list[dict[str, str | list[str]]] = [v.raw for v in val2]
-
-        def normalize_validation(raw_val: dict[str, str | list[str]]) -> str:
-            return json.dumps(raw_val, sort_keys=True)
-
-        normalized1: set[str] = {normalize_validation(v) for v in raw1}
-        normalized2: set[str] = {normalize_validation(v) for v in raw2}
-        return normalized1 == normalized2
+        return self._field_signature(field1) != self._field_signature(field2)
+
+    def _scalar_key(self, field: ContentTypeField) -> tuple:
+        """The field's scalar properties, compared in a single tuple comparison."""
+        return (field.type, field.required, field.localized, field.disabled, field.omitted, field.name)
+
+    def _field_signature(self, field: ContentTypeField) -> tuple:
+        """The field's validations key and Array items, memoized per field."""
+        signature = self._field_signature_cache.get(id(field))
+        if signature is None:
+            signature = self._field_signature_cache[id(field)] = (
+                self._validations_key(field.validations),
+                # Array field items (for Link validations)
+                getattr(field, 'items', None)
+            )
+        return signature
+
+    def _validations_key(self, validations: list[ContentTypeFieldValidation] | None) -> tuple[int, frozenset[str]]:
+        """Key that compares validation lists by their content, not object references or order."""
+        if not validations:
+            return (0, frozenset())
+        return (len(validations), frozenset(json.dumps(v.raw, sort_keys=True) for v in validations))
 
     def _format_field_differences(self, field1: ContentTypeField, field2: ContentTypeField) -> str:
         """Format only the meaningful differences between two fields."""
@@ -286,37 +500,27 @@ class DiffPageBuilder:
         """Extract meaningful validation differences like enabledMarks and linkContentType."""
         differences = []
 
-        # Get validation data for both fields
-        val1_validations: list[ContentTypeFieldValidation] = field1.validations or []
-        val2_validations: list[ContentTypeFieldValidation] = field2.validations or []
-
-        # Extract raw validation data for processing
-        val1_raw: list[dict[str, str | list[str]]] = [v.raw for v in val1_validations]
-        val2_raw: list[dict[str, str | list[str]]] = [v.raw for v in val2_validations]
+        val1_raw, marks1, node_types1, node_links1, general_links1 = self._summarize_validations(field1)
+        val2_raw, marks2, node_types2, node_links2, general_links2 = self._summarize_validations(field2)
 
         # Look for enabledMarks differences
-        marks1: list[str] = self._extract_enabled_marks(val1_raw)
-        marks2: list[str] = self._extract_enabled_marks(val2_raw)
 
         if marks1 != marks2:
-            marks1_str: str = ', '.join(marks1) if marks1 else 'None'
-            marks2_str: str = ', '.join(marks2) if marks2 else 'None'
+            marks1_str: str = ', '.join(sorted(marks1)) if marks1 else 'None'
+            marks2_str: str = ', '.join(sorted(marks2)) if marks2 else 'None'
             differences.append(f'<div class="field-property"><span class="property-name">Enabled Marks:</span> <span class="removed">{marks1_str}</span> → <span class="added">{marks2_str}</span></div>')
 
         # Look for enabledNodeTypes differences
-        node_types1: list[str] = self._extract_enabled_node_types(val1_raw)
-        node_types2: list[str] = self._extract_enabled_node_types(val2_raw)
 
         if node_types1 != node_types2:
-            node_types1_str: str = ', '.join(node_types1) if node_types1 else 'None'
-            node_types2_str: str = ', '.join(node_types2) if node_types2 else 'None'
+            node_types1_str: str = ', '.join(sorted(node_types1)) if node_types1 else 'None'
+            node_types2_str: str = ', '.join(sorted(node_types2)) if node_types2 else 'None'
             differences.append(f'<div class="field-property"><span class="property-name">Enabled Node Types:</span> <span class="removed">{node_types1_str}</span> → <span class="added">{node_types2_str}</span></div>')
 
         # Look for linkContentType differences by node type
-        node_types_to_check = ['embedded-entry-block', 'embedded-entry-inline', 'entry-hyperlink']
-        for node_type in node_types_to_check:
-            links1: list[str] = self._extract_link_content_types_by_node(val1_raw, node_type)
-            links2: list[str] = self._extract_link_content_types_by_node(val2_raw, node_type)
+        for node_type in LINK_NODE_TYPES:
+            links1 = node_links1.get(node_type, EMPTY_LINKS)
+            links2 = node_links2.get(node_type, EMPTY_LINKS)
 
             if links1 != links2:
                 links1_str: str = ', '.join(sorted(links1)) if links1 else 'None'
@@ -325,18 +529,17 @@ class DiffPageBuilder:
                 differences.append(f'<div class="field-property"><span class="property-name">{node_type_display} Link Types:</span> <span class="removed">{links1_str}</span> → <span class="added">{links2_str}</span></div>')
 
         # Look for general linkContentType differences (non-node specific)
-        general_links1: list[str] = self._extract_general_link_content_types(val1_raw)
-        general_links2: list[str] = self._extract_general_link_content_types(val2_raw)
-
         if general_links1 != general_links2:
             links1_str: str = ', '.join(sorted(general_links1)) if general_links1 else 'None'
             links2_str: str = ', '.join(sorted(general_links2)) if general_links2 else 'None'
             differences.append(f'<div class="field-property"><span class="property-name">General Link Content Types:</span> <span class="removed">{links1_str}</span> → <span class="added">{links2_str}</span></div>')
 
         # Check Array field items for linkContentType differences
-        if hasattr(field1, 'items') and hasattr(field2, 'items'):
-            items_links1: list[str] = self._extract_array_link_content_types(field1.items)
-            items_links2: list[str] = self._extract_array_link_content_types(field2.items)
+        items1 = getattr(field1, 'items', _MISSING)
+        items2 = getattr(field2, 'items', _MISSING)
+        if items1 is not _MISSING and items2 is not _MISSING:
+            items_links1 = self._extract_array_link_content_types(items1)
+            items_links2 = self._extract_array_link_content_types(items2)
 
             if items_links1 != items_links2:
                 items1_str: str = ', '.join(sorted(items_links1)) if items_links1 else 'None'
@@ -350,6 +553,48 @@ class DiffPageBuilder:
 
         return differences
 
+    def _summarize_validations(self, field: ContentTypeField) -> tuple:
+        """Collect everything the validation diff reads from a field in one pass, once per field.
+
+        Returns (raw validations, enabledMarks set, enabledNodeTypes set, linkContentType sets per node type,
+        top-level linkContentType set).
+        """
+        summary = self._validation_summary_cache.get(id(field))
+        if summary is not None:
+            return summary
+
+        raw_validations: list[dict[str, str | list[str]]] = [v.raw for v in field.validations or []]
+        marks: list[str] | None = None
+        node_types: list[str] | None = None
+        node_links: dict[str, set[str]] = {}
+        general_links: set[str] = set()
+
+        for validation in raw_validations:
+            # Like the rest of the diff, only the first enabledMarks/enabledNodeTypes entry counts
+            if marks is None and 'enabledMarks' in validation:
+                marks = validation['enabledMarks']
+            if node_types is None and 'enabledNodeTypes' in validation:
+                node_types = validation['enabledNodeTypes']
+            if 'linkContentType' in validation:
+                general_links.update(validation['linkContentType'])
+            nodes = validation.get('nodes')
+            if isinstance(nodes, dict):
+                for node_type, node_entries in nodes.items():
+                    if not isinstance(node_entries, list):
+                        continue
+                    for node_entry in node_entries:
+                        if isinstance(node_entry, dict) and 'linkContentType' in node_entry:
+                            node_links.setdefault(node_type, set()).update(node_entry['linkContentType'])
+
+        summary = self._validation_summary_cache[id(field)] = (
+            raw_validations,
+            frozenset(marks or ()),
+            frozenset(node_types or ()),
+            {node_type: frozenset(links) for node_type, links in node_links.items()},
+            frozenset(general_links)
+        )
+        return summary
+
     def _get_general_validation_differences(self, val1_raw: list[dict[str, str | list[str]]], val2_raw: list[dict[str, str | list[str]]]) -> list[str]:
         """Check for general validation differences like 'in', 'unique', 'size', etc."""
         differences = []
@@ -394,34 +639,18 @@ class DiffPageBuilder:
             missing_in_1 = val2_types - val1_types
             
             if missing_in_2:
-                differences.append(f'<div class="field-property"><span class="property-name">Validations removed:</span> <span class="removed">{", ".join(missing_in_2)}</span></div>')
+                differences.append(f'<div class="field-property"><span class="property-name">Validations removed:</span> <span class="removed">{_escape(", ".join(missing_in_2))}</span></div>')
             if missing_in_1:
-                differences.append(f'<div class="field-property"><span class="property-name">Validations added:</span> <span class="added">{", ".join(missing_in_1)}</span></div>')
+                differences.append(f'<div class="field-property"><span class="property-name">Validations added:</span> <span class="added">{_escape(", ".join(missing_in_1))}</span></div>')
         
         # Compare validation details for common types
         for validation_type in val1_types & val2_types:
             if val1_details.get(validation_type) != val2_details.get(validation_type):
-                differences.append(f'<div class="field-property"><span class="property-name">{validation_type}:</span> <span class="removed">{val1_details.get(validation_type, "None")}</span> → <span class="added">{val2_details.get(validation_type, "None")}</span></div>')
+                differences.append(f'<div class="field-property"><span class="property-name">{_escape(validation_type)}:</span> <span class="removed">{_escape(val1_details.get(validation_type, "None"))}</span> → <span class="added">{_escape(val2_details.get(validation_type, "None"))}</span></div>')
         
         return differences
 
-    def _extract_enabled_marks(self, validations: list[dict[str, str | list[str]]]) -> list[str]:
-        """Extract enabledMarks from validations."""
-        for validation in validations:
-            if 'enabledMarks' in validation:
-                enabled_marks: list[str] = validation['enabledMarks']
-                return enabled_marks
-        return []
-
-    def _extract_enabled_node_types(self, validations: list[dict[str, str | list[str]]]) -> list[str]:
-        """Extract enabledNodeTypes from validations."""
-        for validation in validations:
-            if 'enabledNodeTypes' in validation:
-                enabled_node_types: list[str] = validation['enabledNodeTypes']
-                return enabled_node_types
-        return []
-
-    def _extract_link_content_types(self, validations: list[dict[str, str | list[str]]]) -> list[str]:
+    def _extract_link_content_types(self, validations: list[dict[str, str | list[str]]]) -> frozenset[str]:
         """Extract linkContentType from validations."""
         link_types: list[str] = []
         for validation in validations:
@@ -440,33 +669,9 @@ class DiffPageBuilder:
                                 if isinstance(node_entry, dict) and 'linkContentType' in node_entry:
                                     node_content_types: list[str] = node_entry['linkContentType']
                                     link_types.extend(node_content_types)
-        return list(set(link_types))  # Remove duplicates
-
-    def _extract_link_content_types_by_node(self, validations: list[dict[str, str | list[str]]], target_node_type: str) -> list[str]:
-        """Extract linkContentType from a specific node type."""
-        link_types: list[str] = []
-        for validation in validations:
-            if 'nodes' in validation:
-                nodes: dict[str, list[dict[str, str | list[str]]]] = validation['nodes']
-                if isinstance(nodes, dict) and target_node_type in nodes:
-                    node_entries: list[dict[str, str | list[str]]] = nodes[target_node_type]
-                    for node_entry in node_entries:
-                        if isinstance(node_entry, dict) and 'linkContentType' in node_entry:
-                            node_content_types: list[str] = node_entry['linkContentType']
-                            link_types.extend(node_content_types)
-        return list(set(link_types))  # Remove duplicates
-
-    def _extract_general_link_content_types(self, validations: list[dict[str, str | list[str]]]) -> list[str]:
-        """Extract linkContentType that are not inside nodes (general field-level linkContentType)."""
-        link_types: list[str] = []
-        for validation in validations:
-            # Look for linkContentType at the top level (not inside nodes)
-            if 'linkContentType' in validation:
-                content_types: list[str] = validation['linkContentType']
-                link_types.extend(content_types)
-        return list(set(link_types))  # Remove duplicates
+        return frozenset(link_types)  # Order-free, so callers can compare with ==
 
-    def _extract_array_link_content_types(self, items: dict[str, str | list[dict[str, str | list[str]]]]) -> list[str]:
+    def _extract_array_link_content_types(self, items: dict[str, str | list[dict[str, str | list[str]]]]) -> frozenset[str]:
         """Extract linkContentType from Array field items."""
         link_types: list[str] = []
 
@@ -479,48 +684,36 @@ class DiffPageBuilder:
                     if isinstance(validation, dict) and 'linkContentType' in validation:
                         content_types: list[str] = validation['linkContentType']
                         link_types.extend(content_types)
-        elif hasattr(items, 'validations') and items.validations:
+        elif item_validations := getattr(items, 'validations', None):
             # Items is Contentful object
-            for validation in items.validations:
-                validation_data: dict[str, str | list[str]] = validation.raw if hasattr(validation, 'raw') else validation
+            for validation in item_validations:
+                validation_data: dict[str, str | list[str]] = getattr(validation, 'raw', validation)
                 if isinstance(validation_data, dict) and 'linkContentType' in validation_data:
                     content_types: list[str] = validation_data['linkContentType']
                     link_types.extend(content_types)
                     
-        return list(set(link_types))  # Remove duplicates
+        return frozenset(link_types)  # Order-free, so callers can compare with ==
 
-    def _save_html_file(self, html_content: str) -> str:
-        """Save HTML content to a timestamped file and return the file path."""
+    def _html_file_path(self, now: time.struct_time) -> str:
+        """Return the timestamped path for the HTML diff page, creating its directory."""
         generated_dir = 'generated'
-        if not os.path.exists(generated_dir):
-            os.makedirs(generated_dir)
+        os.makedirs(generated_dir, exist_ok=True)
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = time.strftime("%Y%m%d_%H%M%S", now)
         filename = f"content_model_diff_{timestamp}.html"
-        filepath = os.path.join(generated_dir, filename)
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-
-        print(f"HTML diff page created: {filepath}")
-        print(f"file://{os.path.abspath(filepath)}")
-        return filepath
+        return os.path.join(generated_dir, filename)
     
     def _format_field_properties(self, field: ContentTypeField) -> str:
         """Format field properties for display."""
-        html = ''
-        html += f'<div class="field-property"><span class="property-name">Type:</span> <span class="property-value">{field.type}</span></div>\n'
-        html += f'<div class="field-property"><span class="property-name">Required:</span> <span class="property-value">{field.required}</span></div>\n'
-        html += f'<div class="field-property"><span class="property-name">Localized:</span> <span class="property-value">{field.localized}</span></div>\n'
-        
-        if field.validations:
-            html += f'<div class="field-property"><span class="property-name">Validations:</span> <span class="property-value">{len(field.validations)}</span></div>\n'
-            
+        validations = field.validations
+        html = FIELD_PROPERTIES_TEMPLATE.format(type=field.type, required=field.required, localized=field.localized)
+        if validations:
+            html += FIELD_VALIDATIONS_TEMPLATE.format(count=len(validations))
         return html
 
-    def _generate_html_footer(self) -> str:
+    def _generate_html_footer(self, now: time.struct_time) -> str:
         """Generate HTML footer."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", now)
         return f"""
         <div style="margin-top: 40px; padding-top: 20px; border-top: 1px solid #dee2e6; text-align: center; color: #6c757d; font-size: 14px;">
             Generated on {timestamp}
@@ -532,139 +725,4 @@ class DiffPageBuilder:
 
     def _generate_html_header(self) -> str:
         """Generate HTML header with CSS styles."""
-        return f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Content Model Diff: {self.space1_id} vs {self.space2_id}</title>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            margin: 0;
-            padding: 20px;
-            background-color: #f8f9fa;
-            line-height: 1.6;
-        }}
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            padding: 30px;
-        }}
-        h1 {{
-            color: #333;
-            text-align: center;
-            margin-bottom: 30px;
-            padding-bottom: 20px;
-            border-bottom: 2px solid #e9ecef;
-        }}
-        h2 {{
-            color: #495057;
-            margin-top: 40px;
-            margin-bottom: 20px;
-            padding-left: 10px;
-            border-left: 4px solid #007bff;
-        }}
-        h3 {{
-            color: #6c757d;
-            margin-top: 30px;
-            margin-bottom: 15px;
-        }}
-        .summary {{
-            background: #f8f9fa;
-            padding: 20px;
-            border-radius: 6px;
-            margin-bottom: 30px;
-        }}
-        .summary-item {{
-            margin: 10px 0;
-            padding: 8px 12px;
-            border-radius: 4px;
-        }}
-        .added {{
-            background-color: #d4edda;
-            color: #155724;
-            border-left: 4px solid #28a745;
-        }}
-        .removed {{
-            background-color: #f8d7da;
-            color: #721c24;
-            border-left: 4px solid #dc3545;
-        }}
-        .modified {{
-            background-color: #fff3cd;
-            color: #856404;
-            border-left: 4px solid #ffc107;
-        }}
-        .unchanged {{
-            background-color: #e9ecef;
-            color: #495057;
-            border-left: 4px solid #6c757d;
-        }}
-        .content-type {{
-            margin: 20px 0;
-            border: 1px solid #dee2e6;
-            border-radius: 6px;
-            overflow: hidden;
-        }}
-        .content-type-header {{
-            padding: 15px 20px;
-            font-weight: 600;
-            font-size: 18px;
-        }}
-        .content-type-body {{
-            padding: 20px;
-        }}
-        .field-comparison {{
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 20px;
-            margin: 15px 0;
-        }}
-        .field-side {{
-            border: 1px solid #dee2e6;
-            border-radius: 4px;
-            padding: 15px;
-        }}
-        .field-side h4 {{
-            margin: 0 0 10px 0;
-            color: #495057;
-        }}
-        .field-property {{
-            margin: 5px 0;
-            font-family: 'Monaco', 'Menlo', monospace;
-            font-size: 14px;
-        }}
-        .property-name {{
-            font-weight: 600;
-            color: #6f42c1;
-        }}
-        .property-value {{
-            color: #28a745;
-        }}
-        .no-differences {{
-            text-align: center;
-            color: #28a745;
-            font-size: 18px;
-            margin: 40px 0;
-            padding: 20px;
-            background: #d4edda;
-            border-radius: 6px;
-        }}
-        .space-label {{
-            font-size: 14px;
-            color: #6c757d;
-            font-weight: normal;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>Content Model Comparison</h1>
-        <div style="text-align: center; margin-bottom: 30px;">
-            <strong>Space 1:</strong> {self.space1_id} &nbsp;&nbsp;&nbsp; <strong>Space 2:</strong> {self.space2_id}
-        </div>
-"""
+        return HTML_HEADER_TEMPLATE.substitute(space1_id=self.space1_id, space2_id=self.space2_id)
@@ -7,25 +7,37 @@ This script orchestrates the comparison process by:
 4. Displaying summary statistics
 """
 
-from typing import List
-from content_model_reader import ContentfulModelReader, ContentType
-from diff_page_builder import DiffPageBuilder
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Tuple
 
+if TYPE_CHECKING:
+    from contentful_management import ContentType
+
+
+# (space ID, environment ID) environment variable names for each side of the comparison
+SPACE1_ENV = ('CONTENTFUL_SPACE_ID', 'CONTENTFUL_ENVIRONMENT_ID')
+SPACE2_ENV = ('CONTENTFUL_SPACE_ID_2', 'CONTENTFUL_ENVIRONMENT_ID_2')
+
+
+def run(space1_env: Tuple[str, str], space2_env: Tuple[str, str]) -> int:
+    """Fetch both content models, build the HTML diff page and return the exit code"""
+    # Imported here so the Contentful SDK is only loaded once there is work to do
+    from content_model_reader import ContentfulModelReader
+    from diff_page_builder import DiffPageBuilder
 
-def main():
-    print("🚀 Starting Contentful Content Model Comparison")
-    print("=" * 50)
-    
     try:
         print("\n=== Fetching content models ===")
-        reader1 = ContentfulModelReader('CONTENTFUL_SPACE_ID', 'CONTENTFUL_ENVIRONMENT_ID')
-        reader2 = ContentfulModelReader('CONTENTFUL_SPACE_ID_2', 'CONTENTFUL_ENVIRONMENT_ID_2')
+        reader1 = ContentfulModelReader(*space1_env)
+        reader2 = ContentfulModelReader(*space2_env)
         
         print(f"Space 1: {reader1.space_id} / {reader1.environment_id}")
-        model1: List[ContentType] = reader1.fetch_content_model()
-        
         print(f"Space 2: {reader2.space_id} / {reader2.environment_id}")
-        model2: List[ContentType] = reader2.fetch_content_model()
+
+        # The two spaces are independent, so fetch them concurrently
+        model1: List['ContentType']
+        model2: List['ContentType']
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            model1, model2 = pool.map(lambda reader: reader.fetch_content_model(), [reader1, reader2])
 
         # Generate HTML diff page
         diff_builder = DiffPageBuilder(model1, model2, reader1.space_id, reader2.space_id)
@@ -42,5 +54,12 @@ def main():
     return 0
 
 
+def main():
+    print("🚀 Starting Contentful Content Model Comparison")
+    print("=" * 50)
+    
+    return run(SPACE1_ENV, SPACE2_ENV)
+
+
 if __name__ == "__main__":
     exit(main())
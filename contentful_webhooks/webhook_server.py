@@ -5,16 +5,107 @@ Run with: python webhook_server.py
 """
 
 from flask import Flask, request, jsonify
+import atexit
 import json
+import queue
+import threading
 from datetime import datetime
 import logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LOG_FILE = 'webhook_log.json'
+# Most log entries written with a single call when webhooks arrive in a burst
+LOG_BATCH_SIZE = 64
+# Seconds to wait for the writer to drain the queue at shutdown
+LOG_STOP_TIMEOUT = 5
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Requests hand their log entries to a single writer thread instead of each opening the file
+log_queue = queue.Queue(maxsize=1024)
+
+def dump_log_line(log_entry: dict) -> bytes:
+    """Serialize a log entry to one line of JSON, using orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(log_entry) + b'\n'
+        except TypeError:
+            # orjson rejects e.g. integers wider than 64 bits, which json handles
+            pass
+    return (json.dumps(log_entry) + '\n').encode('utf-8')
+
+def dump_pretty(value) -> str:
+    """Serialize to indented JSON for the console, using orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(value, indent=2)
+
+def serialize_log_entries(batch: list) -> list:
+    """Serialize a batch of log entries, skipping (and logging) any that can't be serialized"""
+    lines = []
+    for log_entry in batch:
+        try:
+            lines.append(dump_log_line(log_entry))
+        except Exception as e:
+            logger.error(f"Error serializing webhook log entry: {str(e)}")
+    return lines
+
+def write_log_entries():
+    """Append queued webhook log entries to the log file until None is queued"""
+    running = True
+    f = None
+    while running:
+        batch = [log_queue.get()]
+        # Pick up whatever else is already waiting, so a burst is written in one call
+        while len(batch) < LOG_BATCH_SIZE:
+            try:
+                batch.append(log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if None in batch:
+            running = False
+            batch = batch[:batch.index(None)]
+        try:
+            if f is None:
+                f = open(LOG_FILE, 'ab')
+            f.writelines(serialize_log_entries(batch))
+            f.flush()
+        except OSError as e:
+            # Keep the writer alive - the file is reopened for the next batch
+            logger.error(f"Error writing {len(batch)} webhook log entries: {str(e)}")
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+                f = None
+    if f is not None:
+        f.close()
+
+def stop_log_writer():
+    """Write out the remaining log entries before the server exits"""
+    try:
+        log_queue.put(None, timeout=LOG_STOP_TIMEOUT)
+    except queue.Full:
+        logger.warning("Webhook log queue is full - unwritten log entries will be lost")
+        return
+    log_writer.join(timeout=LOG_STOP_TIMEOUT)
+
+log_writer = threading.Thread(target=write_log_entries, daemon=True)
+log_writer.start()
+atexit.register(stop_log_writer)
+
 @app.route('/webhook', methods=['POST'])
 def webhook_handler():
     """Handle incoming webhook from Contentful"""
@@ -26,28 +117,27 @@ def webhook_handler():
         # Log the webhook received
         timestamp = datetime.now().isoformat()
         logger.info(f"Webhook received at {timestamp}")
-        logger.info(f"Headers: {json.dumps(headers, indent=2)}")
-        logger.info(f"Payload: {json.dumps(data, indent=2)}")
+        # Serialize the payload once - the console output below already shows it
+        payload_json = dump_pretty(data)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Headers: {dump_pretty(headers)}")
+            logger.debug(f"Payload: {payload_json}")
         
-        # Print to console for easy viewing
-        print("\n" + "="*50)
-        print(f"WEBHOOK RECEIVED - {timestamp}")
-        print("="*50)
-        print("Headers:")
-        for key, value in headers.items():
-            print(f"  {key}: {value}")
-        print("\nPayload:")
-        print(json.dumps(data, indent=2))
-        print("="*50 + "\n")
+        # Print to console for easy viewing (as one write, so concurrent requests don't interleave)
+        lines = ["\n" + "="*50, f"WEBHOOK RECEIVED - {timestamp}", "="*50, "Headers:"]
+        lines.extend(f"  {key}: {value}" for key, value in headers.items())
+        lines.extend(["\nPayload:", payload_json, "="*50 + "\n"])
+        print("\n".join(lines))
         
-        # Save to file for persistence
-        with open('webhook_log.json', 'a') as f:
-            log_entry = {
+        # Save to file for persistence - never block the request on a stalled writer
+        try:
+            log_queue.put_nowait({
                 'timestamp': timestamp,
                 'headers': headers,
                 'payload': data
-            }
-            f.write(json.dumps(log_entry) + '\n')
+            })
+        except queue.Full:
+            logger.warning(f"Webhook log queue is full - not saving the webhook received at {timestamp}")
         
         # Return success response
         return jsonify({'status': 'success', 'message': 'Webhook received'}), 200
@@ -80,5 +170,5 @@ if __name__ == '__main__':
     print("Health check: http://localhost:5000/health")
     print("Press Ctrl+C to stop")
     
-    # Run the server
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Run the server - without the debugger and reloader, handling each request in its own thread
+    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
@@ -9,20 +9,67 @@ This module provides functionality to:
 - Generate a CSV report of matching pages
 """
 
+import asyncio
 import contentful
+import json
 import os
 import csv
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import aiohttp
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Maximum number of entries Contentful returns for a single `sys.id[in]` query
+BATCH_SIZE = 100
+DELIVERY_API_URL = 'https://cdn.contentful.com'
+# Rate limited (429) and server error responses are retried this many times with backoff
+MAX_RETRIES = 5
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_BACKOFF_SECONDS = 0.5
+CSV_FIELDNAMES = ('slug', 'page_id', 'title')
+# Write the report in 1 MiB blocks instead of the default ~8 KiB
+CSV_BUFFER_SIZE = 1024 * 1024
+
+
+def _localize(value: Any, value_key: Optional[str] = None) -> Any:
+    """Resolve a field that is either a plain value or a {locale: value} dict.
+    
+    Object values (links, RichText) are recognized by `value_key`, e.g. 'sys' or 'nodeType'.
+    """
+    if isinstance(value, dict):
+        if value_key in value:
+            return value
+        return value.get('en-US') or value.get('en') or next(iter(value.values()), None)
+    return value if isinstance(value, str) else None
+
+
+def _leading_text(richtext_content: Dict[str, Any]) -> Optional[str]:
+    """Fast path for the usual article shape: the first block starts with a non-empty text node"""
+    try:
+        node = richtext_content['content'][0]['content'][0]
+    except (KeyError, IndexError, TypeError):
+        return None
+    if node.get('nodeType') == 'text' and node.get('value'):
+        return node['value'].strip() or None
+    return None
+
 
 class PageTitleFinder:
 
-    def __init__(self, space_id_env: str, environment_id_env: str, access_token_env: str):
+    def __init__(self, space_id_env: str, environment_id_env: str, access_token_env: str,
+                 max_workers: int = 50):
         load_dotenv('.env')
         self.space_id = os.getenv(space_id_env)
         self.environment_id = os.getenv(environment_id_env)
         self.access_token = os.getenv(access_token_env)
+        # Number of concurrent batch requests (the Delivery API is served from a CDN)
+        self.max_workers = max_workers
+        # Article fields by ID, filled from the page query's includes
+        self.articles: Dict[str, Dict[str, Any]] = {}
         
         # Initialize Contentful client
         self.client = contentful.Client(
@@ -39,10 +86,10 @@ class PageTitleFinder:
             limit = 100
             
             while True:
-                # Fetch without resolving any links to avoid recursion
+                # Resolve one level of links, so the linked articles arrive in the same response
                 response = self.client.entries({
                     'content_type': 'page',
-                    'include': 0,  # Don't resolve any references
+                    'include': 1,  # Linked entries only, not their own references
                     'limit': limit,
                     'skip': skip
                 })
@@ -52,10 +99,15 @@ class PageTitleFinder:
                 
                 # Convert to raw dict to avoid SDK's lazy loading
                 for entry in response:
+                    content_link_id = None
+                    article = entry.fields().get('content')
+                    if isinstance(article, contentful.Entry):
+                        content_link_id = article.id
+                        self.articles[content_link_id] = article.raw.get('fields', {})
                     pages.append({
                         'id': entry.sys.get('id'),
                         'fields': entry.raw.get('fields', {}),
-                        'content_link_id': None
+                        'content_link_id': content_link_id
                     })
                 
                 if len(response) < limit:
@@ -70,47 +122,98 @@ class PageTitleFinder:
             print(f"❌ Error fetching pages: {str(e)}")
             raise
     
-    def extract_first_text_from_richtext(self, richtext_content: Dict[str, Any]) -> Optional[str]:
-        """Extract the first text content from a RichText field"""
+    def heading_matches_first_text(self, richtext_content: Dict[str, Any], heading_casefold: str) -> bool:
+        """Check if the first text in a RichText field matches an already stripped and casefolded heading"""
         if not richtext_content or 'content' not in richtext_content:
-            return None
+            return False
         
-        def get_first_text(nodes):
-            """Recursively search for the first text node"""
-            for node in nodes:
-                # Check if this node has text value
-                if node.get('nodeType') == 'text' and node.get('value'):
-                    text = node.get('value', '').strip()
-                    if text:
-                        return text
-                
-                # Check if this node is a heading or paragraph with content
-                if node.get('nodeType') in ['heading-1', 'heading-2', 'heading-3', 
-                                            'heading-4', 'heading-5', 'heading-6', 
-                                            'paragraph']:
-                    if 'content' in node:
-                        result = get_first_text(node['content'])
-                        if result:
-                            return result
-                
-                # Recursively search in content
-                if 'content' in node:
-                    result = get_first_text(node['content'])
-                    if result:
-                        return result
+        text = _leading_text(richtext_content)
+        if text:
+            return text.casefold() == heading_casefold
+        
+        # Otherwise walk the tree with an explicit stack, pushing children in reverse to keep document order
+        stack = list(reversed(richtext_content['content']))
+        while stack:
+            node = stack.pop()
+            if node.get('nodeType') == 'text' and node.get('value'):
+                text = node['value'].strip()
+                if text:
+                    # Stop at the first text - only it can match the heading
+                    return text.casefold() == heading_casefold
             
-            return None
+            children = node.get('content')
+            if children:
+                stack.extend(reversed(children))
         
-        return get_first_text(richtext_content['content'])
+        return False
+    
+    async def _get_json_with_retry(self, session: aiohttp.ClientSession, url: str,
+                                   params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET a JSON response, retrying rate limits, server errors and dropped connections with backoff"""
+        for attempt in range(MAX_RETRIES + 1):
+            delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                        response.raise_for_status()
+                        # Rich text bodies make these responses large - parse them with orjson when it is installed
+                        return await response.json(loads=orjson.loads if orjson is not None else json.loads)
+                    # Contentful says how many seconds remain until the rate limit resets
+                    reset = response.headers.get('X-Contentful-RateLimit-Reset')
+                    if reset is not None:
+                        try:
+                            delay = max(delay, float(reset))
+                        except ValueError:
+                            pass
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == MAX_RETRIES:
+                    raise
+            await asyncio.sleep(delay)
     
-    def fetch_article_content(self, article_id: str) -> Optional[Dict[str, Any]]:
-        """Fetch a single article entry"""
+    async def _fetch_articles_batch_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                          article_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch a batch of articles with one REST request"""
+        url = f"{DELIVERY_API_URL}/spaces/{self.space_id}/environments/{self.environment_id}/entries"
+        params = {
+            'sys.id[in]': ','.join(article_ids),
+            'include': 0,
+            'limit': len(article_ids)
+        }
         try:
-            article = self.client.entry(article_id)
-            return article.raw.get('fields', {})
+            async with semaphore:
+                data = await self._get_json_with_retry(session, url, params)
         except Exception as e:
-            print(f"  ⚠️  Error fetching article {article_id}: {str(e)}")
-            return None
+            print(f"  ❌ Error fetching articles {article_ids[0]}..{article_ids[-1]}: {str(e)}")
+            raise
+        
+        # IDs missing from the response don't exist (or aren't published) in this environment
+        return {item['sys']['id']: item.get('fields', {}) for item in data.get('items', [])}
+    
+    async def fetch_articles_async(self, article_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch all articles in batches with concurrent REST requests on a single event loop"""
+        headers = {'Authorization': f'Bearer {self.access_token}'}
+        batches = [article_ids[i:i + BATCH_SIZE] for i in range(0, len(article_ids), BATCH_SIZE)]
+        # Bound in-flight requests (aiohttp's connector allows 100 by default)
+        semaphore = asyncio.Semaphore(self.max_workers)
+        connector = aiohttp.TCPConnector(limit=self.max_workers)
+        
+        articles = {}
+        failed = 0
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            # Let every batch finish before failing, so no request is left running on a closed session
+            for batch_articles in await asyncio.gather(
+                *(self._fetch_articles_batch_async(session, semaphore, batch) for batch in batches),
+                return_exceptions=True
+            ):
+                if isinstance(batch_articles, BaseException):
+                    failed += 1
+                else:
+                    articles.update(batch_articles)
+        
+        # A dropped batch would hide its pages from the report, so fail instead of skipping them
+        if failed:
+            raise RuntimeError(f"Failed to fetch {failed} of {len(batches)} article batches")
+        return articles
     
     def check_duplicate_titles(self, pages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
         """Check which pages have titles matching their article's first text"""
@@ -118,48 +221,27 @@ class PageTitleFinder:
         processed = 0
         skipped = 0
         
+        # Resolve the page fields first, so only pages linking an article need a request
+        candidates: List[Tuple[str, str, str, str, str]] = []
         for page in pages:
             try:
                 page_id = page.get('id', '')
-                fields = page.get('fields', {})
+                fields_get = page.get('fields', {}).get
                 
                 # Get slug - might be direct string or in locale dict
-                slug_data = fields.get('slug')
-                if isinstance(slug_data, str):
-                    slug = slug_data
-                elif isinstance(slug_data, dict):
-                    slug = slug_data.get('en-US') or slug_data.get('en') or next(iter(slug_data.values()), None)
-                else:
-                    slug = None
-                
+                slug = _localize(fields_get('slug'))
                 if not slug:
                     skipped += 1
                     continue
                 
                 # Get heading - might be direct string or in locale dict
-                heading_data = fields.get('heading')
-                if isinstance(heading_data, str):
-                    heading = heading_data
-                elif isinstance(heading_data, dict):
-                    heading = heading_data.get('en-US') or heading_data.get('en') or next(iter(heading_data.values()), None)
-                else:
-                    heading = None
-                
+                heading = _localize(fields_get('heading'))
                 if not heading:
                     skipped += 1
                     continue
                 
-                # Get linked content reference
-                content_ref = fields.get('content')
-                if isinstance(content_ref, dict) and 'sys' in content_ref:
-                    # Direct link object
-                    content_link = content_ref
-                elif isinstance(content_ref, dict):
-                    # Localized link
-                    content_link = content_ref.get('en-US') or content_ref.get('en') or next(iter(content_ref.values()), None)
-                else:
-                    content_link = None
-                
+                # Get linked content reference - direct link object or localized link
+                content_link = _localize(fields_get('content'), 'sys')
                 if not content_link or not isinstance(content_link, dict):
                     skipped += 1
                     continue
@@ -170,32 +252,42 @@ class PageTitleFinder:
                     skipped += 1
                     continue
                 
-                # Fetch the article to check its type and content
-                article_fields = self.fetch_article_content(article_id)
+                # Casefold rather than lower, so e.g. 'ß' and 'SS' compare equal
+                candidates.append((page_id, slug, heading, heading.strip().casefold(), article_id))
+                    
+            except Exception as e:
+                # Try to get slug for error message
+                try:
+                    slug_name = _localize(page.get('fields', {}).get('slug')) or 'unknown'
+                except:
+                    slug_name = 'unknown'
+                print(f"  ⚠️  Error processing page '{slug_name}': {str(e)}")
+                skipped += 1
+                continue
+        
+        # Articles usually came with the pages; fetch any others BATCH_SIZE at a time
+        missing_ids = list(dict.fromkeys(
+            article_id for *_, article_id in candidates if article_id not in self.articles
+        ))
+        if missing_ids:
+            self.articles.update(asyncio.run(self.fetch_articles_async(missing_ids)))
+        articles = self.articles
+        
+        for page_id, slug, heading, heading_casefold, article_id in candidates:
+            try:
+                article_fields = articles.get(article_id)
                 if not article_fields:
                     skipped += 1
                     continue
                 
-                # Get the article's content (RichText field)
-                article_content_data = article_fields.get('content')
-                # Handle different formats
-                if isinstance(article_content_data, dict) and 'nodeType' in article_content_data:
-                    # Direct RichText object
-                    article_content = article_content_data
-                elif isinstance(article_content_data, dict):
-                    # Localized RichText
-                    article_content = article_content_data.get('en-US') or article_content_data.get('en') or next(iter(article_content_data.values()), None)
-                else:
-                    article_content = None
-                
+                # Get the article's content - direct RichText object or localized RichText
+                article_content = _localize(article_fields.get('content'), 'nodeType')
                 if not isinstance(article_content, dict):
                     skipped += 1
                     continue
                 
-                # Extract first text from article
-                first_text = self.extract_first_text_from_richtext(article_content)
-                
-                if first_text and heading.strip().lower() == first_text.strip().lower():
+                # Compare the heading with the article's first text
+                if self.heading_matches_first_text(article_content, heading_casefold):
                     duplicates.append({
                         'slug': slug,
                         'page_id': page_id,
@@ -206,18 +298,7 @@ class PageTitleFinder:
                 processed += 1
                     
             except Exception as e:
-                # Try to get slug for error message
-                try:
-                    slug_data = page.get('fields', {}).get('slug')
-                    if isinstance(slug_data, str):
-                        slug_name = slug_data
-                    elif isinstance(slug_data, dict):
-                        slug_name = slug_data.get('en-US') or slug_data.get('en') or 'unknown'
-                    else:
-                        slug_name = 'unknown'
-                except:
-                    slug_name = 'unknown'
-                print(f"  ⚠️  Error processing page '{slug_name}': {str(e)}")
+                print(f"  ⚠️  Error processing page '{slug}': {str(e)}")
                 skipped += 1
                 continue
         
@@ -229,18 +310,15 @@ class PageTitleFinder:
     def generate_csv_report(self, duplicates: List[Dict[str, str]], filename: str = 'duplicate_titles.csv'):
         """Generate a CSV report of pages with duplicate titles"""
         generated_dir = 'generated'
-        if not os.path.exists(generated_dir):
-            os.makedirs(generated_dir)
+        os.makedirs(generated_dir, exist_ok=True)
         
         filepath = os.path.join(generated_dir, filename)
         
-        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['slug', 'page_id', 'title']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for duplicate in duplicates:
-                writer.writerow(duplicate)
+        with open(filepath, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as csvfile:
+            # Plain csv writer - the columns are fixed, so rows are written as tuples
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_FIELDNAMES)
+            writer.writerows(tuple(duplicate[name] for name in CSV_FIELDNAMES) for duplicate in duplicates)
         
         print(f"\n✅ CSV report generated: {filepath}")
         return filepath
@@ -1,19 +1,72 @@
 
 
-# Read production IDs
-with open('prod_contentful_ids.txt', 'r') as f:
-    prod_ids = set(line.strip() for line in f if line.strip())
+def read_ids(filename):
+    """Yield the non-empty IDs in a file, one line at a time"""
+    with open(filename, 'r') as f:
+        for line in f:
+            id = line.strip()
+            if id:
+                yield id
 
-# Read staging IDs
-with open('staging_contentful_ids.txt', 'r') as f:
-    staging_ids = set(line.strip() for line in f if line.strip())
+
+def unique_ids(filename):
+    """Yield the IDs of a sorted file, skipping repeats"""
+    previous = None
+    for id in read_ids(filename):
+        if id != previous:
+            yield id
+            previous = id
+
+
+def is_sorted(filename):
+    """Check whether a file's IDs are in ascending order without loading it"""
+    previous = None
+    for id in read_ids(filename):
+        if previous is not None and id < previous:
+            return False
+        previous = id
+    return True
+
+
+def compare_sorted(prod_file, staging_file):
+    """Walk two sorted files once, holding only the current ID of each in memory"""
+    prod_count = 0
+    staging_count = 0
+    missing = []
+    staging = unique_ids(staging_file)
+    staging_id = next(staging, None)
+    for id in unique_ids(prod_file):
+        prod_count += 1
+        while staging_id is not None and staging_id < id:
+            staging_count += 1
+            staging_id = next(staging, None)
+        if staging_id != id:
+            missing.append(id)
+    # Count the staging IDs past the last prod ID
+    if staging_id is not None:
+        staging_count += 1 + sum(1 for _ in staging)
+    return prod_count, staging_count, missing
+
+
+def compare_unsorted(prod_file, staging_file):
+    """Compare two files of IDs in any order using sets"""
+    prod_ids = set(read_ids(prod_file))
+    staging_ids = set(read_ids(staging_file))
+    return len(prod_ids), len(staging_ids), sorted(prod_ids - staging_ids)
+
+
+# Sorted dumps can be compared line by line; anything else needs the IDs in memory
+if is_sorted('prod_contentful_ids.txt') and is_sorted('staging_contentful_ids.txt'):
+    compare = compare_sorted
+else:
+    compare = compare_unsorted
 
 # Find IDs in prod but not in staging
-missing_in_staging = prod_ids - staging_ids
+prod_count, staging_count, missing_in_staging = compare('prod_contentful_ids.txt', 'staging_contentful_ids.txt')
 
-print(f"Total prod IDs: {len(prod_ids)}")
-print(f"Total staging IDs: {len(staging_ids)}")
+print(f"Total prod IDs: {prod_count}")
+print(f"Total staging IDs: {staging_count}")
 print(f"IDs in prod but not in staging: {len(missing_in_staging)}")
 print("\nMissing IDs:")
-for id in sorted(missing_in_staging):
+for id in missing_in_staging:
     print(id)
@@ -10,25 +10,104 @@ This module provides functionality to:
 """
 
 from contentful_management import Client
+from contentful_management.errors import BadGatewayError, RateLimitExceededError, ServerError, ServiceUnavailableError
+import hashlib
+import json
 import os
 import csv
-import copy
-from typing import List, Dict, Any, Optional
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Maximum number of entries Contentful returns for a single `sys.id[in]` query
+BATCH_SIZE = 100
+# Rate limited (429) and server error responses are retried this many times with backoff
+MAX_RETRIES = 5
+RETRY_ERRORS = (RateLimitExceededError, ServerError, BadGatewayError, ServiceUnavailableError)
+RETRY_BACKOFF_SECONDS = 0.5
+# Top-level node types that count as an article's first line
+FIRST_LINE_NODE_TYPES = frozenset({'heading-1'})
+# Digest of each article's content as we left it, so re-runs don't strip another heading
+PROCESSED_ARTICLES_FILE = os.path.join('generated', 'processed_articles.json')
+# Article updates sent per second across all workers (the Management API allows 10)
+UPDATES_PER_SECOND = 7
+
+
+def _content_digest(content_field: Dict[str, Any]) -> str:
+    """Hash a content field (all locales) independently of key order"""
+    # Both serializers produce the same compact, sorted UTF-8 form, so digests match with or without orjson
+    if orjson is not None:
+        content_json = orjson.dumps(content_field, option=orjson.OPT_SORT_KEYS)
+    else:
+        content_json = json.dumps(content_field, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return hashlib.blake2b(content_json, digest_size=16).hexdigest()
+
 
 class ArticleFirstLineRemover:
 
-    def __init__(self, space_id_env: str, environment_id_env: str, management_token_env: str):
+    def __init__(self, space_id_env: str, environment_id_env: str, management_token_env: str,
+                 max_workers: int = 4):
         load_dotenv('.env')
         self.space_id = os.getenv(space_id_env)
         self.environment_id = os.getenv(environment_id_env)
         self.management_token = os.getenv(management_token_env)
+        # Number of concurrent article updates (throttled to UPDATES_PER_SECOND overall)
+        self.max_workers = max_workers
+        self._rate_limit_lock = threading.Lock()
+        self._next_request_time = 0.0
+        self._output: List[str] = []
         
         # Initialize Contentful Management API client
         self.client = Client(self.management_token)
         self.space = self.client.spaces().find(self.space_id)
         self.environment = self.space.environments().find(self.environment_id)
+        self.processed_articles = self._load_processed_articles()
+    
+    def _load_processed_articles(self) -> Dict[str, str]:
+        """Read the content digests recorded by previous live runs"""
+        try:
+            with open(PROCESSED_ARTICLES_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            print(f"⚠️  Ignoring unreadable {PROCESSED_ARTICLES_FILE}: {str(e)}")
+            return {}
+    
+    def _save_processed_articles(self):
+        """Record the content digests of the updated articles for the next run"""
+        os.makedirs(os.path.dirname(PROCESSED_ARTICLES_FILE), exist_ok=True)
+        # Write a temporary file and swap it in, so an interrupted write never leaves a truncated file
+        temp_file = PROCESSED_ARTICLES_FILE + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.processed_articles, f, indent=2, sort_keys=True)
+        os.replace(temp_file, PROCESSED_ARTICLES_FILE)
+    
+    def is_already_processed(self, article_entry) -> bool:
+        """Check if an article still has the content a previous run saved for it"""
+        digest = self.processed_articles.get(article_entry.id)
+        if digest is None:
+            return False
+        return digest == _content_digest(article_entry.to_json().get('fields', {}).get('content', {}))
+    
+    def _report(self, line: str):
+        """Queue a line of output, written with the rest of its page by _flush_output"""
+        self._output.append(line)
+    
+    def _flush_output(self):
+        """Write the queued output with a single call"""
+        if self._output:
+            sys.stdout.write('\n'.join(self._output) + '\n')
+            sys.stdout.flush()
+            self._output.clear()
     
     def read_csv(self, filename: str) -> List[Dict[str, str]]:
         """Read page IDs and slugs from CSV file"""
@@ -48,26 +127,55 @@ class ArticleFirstLineRemover:
             print(f"❌ Error reading CSV {filename}: {str(e)}")
             raise
     
-    def get_article_id_from_page(self, page_id: str) -> Optional[str]:
+    def _article_id_from_page_entry(self, page_entry) -> Optional[str]:
         """Get the linked article ID from a page entry"""
-        try:
-            page_entry = self.environment.entries().find(page_id)
-            page_json = page_entry.to_json()
-            fields = page_json.get('fields', {})
-            
-            # Get the content reference
-            content_ref = fields.get('content', {})
-            # Get the link from the first available locale
-            content_link = content_ref.get('en-US') or content_ref.get('en') or next(iter(content_ref.values()), None)
-            
-            if content_link and isinstance(content_link, dict):
-                article_id = content_link.get('sys', {}).get('id')
-                return article_id
-            
-            return None
-        except Exception as e:
-            print(f"  ⚠️  Error fetching page {page_id}: {str(e)}")
-            return None
+        fields = page_entry.to_json().get('fields', {})
+        
+        # Get the content reference
+        content_ref = fields.get('content', {})
+        # Get the link from the first available locale
+        content_link = content_ref.get('en-US') or content_ref.get('en') or next(iter(content_ref.values()), None)
+        
+        if content_link and isinstance(content_link, dict):
+            article_id = content_link.get('sys', {}).get('id')
+            return article_id
+        
+        return None
+    
+    def fetch_entries(self, entry_ids: List[str]) -> Dict[str, Any]:
+        """Fetch entries BATCH_SIZE at a time with `sys.id[in]` queries, keyed by ID"""
+        entries = {}
+        for start in range(0, len(entry_ids), BATCH_SIZE):
+            batch = entry_ids[start:start + BATCH_SIZE]
+            try:
+                for entry in self._fetch_entries_batch(batch):
+                    entries[entry.id] = entry
+            except Exception as e:
+                # A failed batch must not be reported as missing entries - stop before anything is updated
+                print(f"  ❌ Error fetching entries {batch[0]}..{batch[-1]}: {str(e)}")
+                raise
+        return entries
+    
+    def _fetch_entries_batch(self, batch: List[str]) -> List[Any]:
+        """Fetch one batch of entries, retrying rate limits and server errors with backoff"""
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                return self.environment.entries().all({
+                    'sys.id[in]': ','.join(batch),
+                    'limit': len(batch)
+                })
+            except RETRY_ERRORS as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+                # Contentful says how many seconds remain until the rate limit resets
+                reset = e.response.headers.get('X-Contentful-RateLimit-Reset')
+                if reset is not None:
+                    try:
+                        delay = max(delay, float(reset))
+                    except ValueError:
+                        pass
+                time.sleep(delay)
     
     def remove_first_text_node(self, richtext_content: Dict[str, Any]) -> Dict[str, Any]:
         """Remove the first text content from a RichText field"""
@@ -78,59 +186,45 @@ class ArticleFirstLineRemover:
         if not content_nodes:
             return richtext_content
         
-        # Make a deep copy to avoid modifying the original
-        new_richtext = copy.deepcopy(richtext_content)
-        new_content = new_richtext.get('content', [])
-        
-        # Find and remove the first node that contains text
-        removed = False
-        for i, node in enumerate(new_content):
+        # Find the first node that contains text
+        for i, node in enumerate(content_nodes):
             node_type = node.get('nodeType', '')
             
             # Check if this is a heading or paragraph with text
-            if node_type in ['heading-1']:
+            if node_type in FIRST_LINE_NODE_TYPES:
                 # Check if it has actual text content
                 if self._has_text_content(node):
-                    print(f"    Removing node type: {node_type}")
-                    new_content.pop(i)
-                    removed = True
-                    break
+                    self._report(f"    Removing node type: {node_type}")
+                    # Only the top-level dict and list are rebuilt - the remaining nodes are shared, not copied
+                    return {**richtext_content, 'content': content_nodes[:i] + content_nodes[i + 1:]}
         
-        if not removed:
-            print(f"    No text node found to remove")
-            return richtext_content
-        
-        # Update the content in the new richtext structure
-        new_richtext['content'] = new_content
-        return new_richtext
+        self._report(f"    No text node found to remove")
+        return richtext_content
     
     def _has_text_content(self, node: Dict[str, Any]) -> bool:
         """Check if a node contains actual text"""
-        if 'content' not in node:
-            return False
-        
-        for child in node['content']:
-            if child.get('nodeType') == 'text' and child.get('value', '').strip():
-                return True
-            # Recursively check nested content
-            if 'content' in child and self._has_text_content(child):
-                return True
+        # Walk nested content with an explicit stack - any text node will do, so order doesn't matter
+        stack = [node]
+        while stack:
+            for child in stack.pop().get('content', ()):
+                if child.get('nodeType') == 'text' and child.get('value', '').strip():
+                    return True
+                if 'content' in child:
+                    stack.append(child)
         
         return False
     
-    def update_article(self, article_id: str, dry_run: bool = True) -> bool:
-        """Update an article to remove the first text node"""
+    def prepare_article_update(self, article_entry) -> Optional[Dict[str, Any]]:
+        """Build the article's content field without its first text node, or None if nothing changes"""
         try:
-            # Fetch the article
-            article_entry = self.environment.entries().find(article_id)
             article_json = article_entry.to_json()
             fields = article_json.get('fields', {})
             
             # Get the content field for all locales
             content_field = fields.get('content', {})
             if not content_field:
-                print(f"    No content field found")
-                return False
+                self._report(f"    No content field found")
+                return None
             
             # Track if we modified anything
             modified = False
@@ -139,10 +233,11 @@ class ArticleFirstLineRemover:
             # Process each locale
             for locale, richtext_content in content_field.items():
                 if isinstance(richtext_content, dict) and 'nodeType' in richtext_content:
-                    print(f"    Processing locale: {locale}")
+                    self._report(f"    Processing locale: {locale}")
                     new_content = self.remove_first_text_node(richtext_content)
                     
-                    if new_content != richtext_content:
+                    # The original object comes back unchanged when nothing was removed
+                    if new_content is not richtext_content:
                         updated_content[locale] = new_content
                         modified = True
                     else:
@@ -152,35 +247,74 @@ class ArticleFirstLineRemover:
                     # Keep non-richtext content as-is
                     updated_content[locale] = richtext_content
             
-            if modified and not dry_run:
-                # Update using the SDK's proper field update mechanism
-                try:
-                    # Build the fields dict for update
-                    updated_fields = article_entry.to_json().get('fields', {})
-                    updated_fields['content'] = updated_content
-                    
-                    # Create attributes dict with all fields
-                    attributes = {'fields': updated_fields}
-                    
-                    # Use the update method which properly handles field changes
-                    article_entry.update(attributes)
-                    
-                    print(f"    ✅ Article updated and saved")
-                    return True
-                except Exception as save_error:
-                    print(f"    ❌ Save error: {str(save_error)}")
-                    print(f"    Details: {repr(save_error)}")
-                    return False
-            elif modified:
-                print(f"    ℹ️  Would update article (dry run)")
-                return True
-            else:
-                print(f"    No changes needed")
-                return False
+            if not modified:
+                self._report(f"    No changes needed")
+                return None
+            return updated_content
                 
         except Exception as e:
-            print(f"    ❌ Error updating article {article_id}: {str(e)}")
-            return False
+            self._report(f"    ❌ Error updating article {article_entry.id}: {str(e)}")
+            return None
+    
+    def _save_article_update(self, article_entry, updated_content: Dict[str, Any]):
+        """Save an article's updated content field (safe to call from worker threads)"""
+        # Build the fields dict for update
+        updated_fields = article_entry.to_json().get('fields', {})
+        updated_fields['content'] = updated_content
+        
+        # Use the update method which properly handles field changes
+        self._wait_for_rate_limit()
+        article_entry.update({'fields': updated_fields})
+    
+    def _wait_for_rate_limit(self):
+        """Space out update requests across all workers to stay under the Management API rate limit"""
+        with self._rate_limit_lock:
+            now = time.monotonic()
+            wait = self._next_request_time - now
+            self._next_request_time = max(now, self._next_request_time) + 1 / UPDATES_PER_SECOND
+        if wait > 0:
+            time.sleep(wait)
+    
+    def _record_processed_article(self, article_id: str, updated_content: Dict[str, Any]):
+        """Record an updated article's new content digest (written out by _save_processed_articles)"""
+        self.processed_articles[article_id] = _content_digest(updated_content)
+    
+    def save_article_updates(self, pending_updates: Dict[str, Any]) -> Tuple[int, int]:
+        """Save the prepared article updates concurrently and return the updated/error counts"""
+        updated = 0
+        errors = 0
+        
+        self._report(f"=== Saving {len(pending_updates)} articles ===")
+        # Show the planning output before the first save results come in
+        self._flush_output()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(self._save_article_update, article_entry, updated_content): (article_id, updated_content)
+                    for article_id, (article_entry, updated_content) in pending_updates.items()
+                }
+                # Results are handled here on the main thread, so the digests need no locking
+                for future in as_completed(futures):
+                    article_id, updated_content = futures[future]
+                    try:
+                        future.result()
+                    except Exception as save_error:
+                        self._report(f"  ❌ Save error for article {article_id}: {str(save_error)}")
+                        self._report(f"    Details: {repr(save_error)}")
+                        errors += 1
+                        self._flush_output()
+                        continue
+                    
+                    self._record_processed_article(article_id, updated_content)
+                    self._report(f"  ✅ Article {article_id} updated and saved")
+                    self._flush_output()
+                    updated += 1
+        finally:
+            # Written once at the end - also when interrupted, so the next run knows what this one changed
+            if updated:
+                self._save_processed_articles()
+        
+        return updated, errors
     
     def process_pages(self, pages: List[Dict[str, str]], dry_run: bool = True):
         """Process all pages and update their articles"""
@@ -193,33 +327,79 @@ class ArticleFirstLineRemover:
         skipped = 0
         errors = 0
         
-        for i, page in enumerate(pages, 1):
-            page_id = page['page_id']
-            slug = page['slug']
-            title = page.get('title', 'N/A')
-            
-            print(f"[{i}/{total}] Processing: {slug}")
-            print(f"  Page ID: {page_id}")
-            print(f"  Title: {title}")
-            
-            # Get the article ID
-            article_id = self.get_article_id_from_page(page_id)
-            if not article_id:
-                print(f"  ⚠️  No article found for this page")
-                skipped += 1
-                continue
-            
-            print(f"  Article ID: {article_id}")
-            
-            # Update the article
-            success = self.update_article(article_id, dry_run)
+        try:
+            # Fetch all pages, then all their articles, in batches instead of one request each
+            page_entries = self.fetch_entries(list(dict.fromkeys(page['page_id'] for page in pages)))
+            article_ids = {}
+            for page_id, page_entry in page_entries.items():
+                try:
+                    article_ids[page_id] = self._article_id_from_page_entry(page_entry)
+                except Exception as e:
+                    self._report(f"  ⚠️  Error reading page {page_id}: {str(e)}")
+            self._flush_output()
+            article_entries = self.fetch_entries(list(dict.fromkeys(filter(None, article_ids.values()))))
+            seen_articles = set()
+            pending_updates = {}
             
-            if success:
-                updated += 1
-            else:
-                errors += 1
+            for i, page in enumerate(pages, 1):
+                # Write the previous page's lines in one call, so progress is never more than a page behind
+                self._flush_output()
+                page_id = page['page_id']
+                slug = page['slug']
+                title = page.get('title', 'N/A')
+                
+                self._report(f"[{i}/{total}] Processing: {slug}")
+                self._report(f"  Page ID: {page_id}")
+                self._report(f"  Title: {title}")
+                
+                # Get the article ID
+                if page_id not in page_entries:
+                    self._report(f"  ⚠️  Error fetching page {page_id}: Entry not found")
+                article_id = article_ids.get(page_id)
+                if not article_id:
+                    self._report(f"  ⚠️  No article found for this page")
+                    skipped += 1
+                    continue
+                
+                self._report(f"  Article ID: {article_id}")
+                
+                # Pages sharing an article must not strip it twice
+                if article_id in seen_articles:
+                    self._report(f"  ℹ️  Article already processed for another page")
+                    skipped += 1
+                    continue
+                seen_articles.add(article_id)
+                
+                article_entry = article_entries.get(article_id)
+                if article_entry is None:
+                    self._report(f"    ❌ Error updating article {article_id}: Entry not found")
+                    errors += 1
+                    continue
+                
+                if self.is_already_processed(article_entry):
+                    self._report(f"  ℹ️  Article already processed on a previous run")
+                    skipped += 1
+                    continue
+                
+                # Work out the change now; live saves run concurrently once every page is checked
+                updated_content = self.prepare_article_update(article_entry)
+                if updated_content is None:
+                    errors += 1
+                elif dry_run:
+                    self._report(f"    ℹ️  Would update article (dry run)")
+                    updated += 1
+                else:
+                    pending_updates[article_id] = (article_entry, updated_content)
+                
+                self._report("")
             
-            print()
+            if pending_updates:
+                saved, save_errors = self.save_article_updates(pending_updates)
+                updated += saved
+                errors += save_errors
+        finally:
+            # Write whatever is still queued - also when a fetch or save raises, or on Ctrl-C
+            self._flush_output()
         
         # Summary
         print(f"\n{'='*60}")